@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+from time import perf_counter
+
+os.environ.setdefault('BOT_TOKEN', '1:benchmark')
+os.environ.setdefault('CHANNEL_ID', '@benchmark')
+
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from main_bot import build_request
+
+SEND_MESSAGE = json.dumps({
+    'ok': True,
+    'result': {'message_id': 1, 'date': 0, 'chat': {'id': 1, 'type': 'private'}, 'text': 'x'},
+}).encode()
+
+
+def fake_api(latency: float):
+    """Connection handler of a local HTTP/1.1 server answering every call after `latency` seconds."""
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    if line.lower().startswith(b"content-length:"):
+                        length = int(line.split(b":")[1])
+                await reader.readexactly(length)
+                await asyncio.sleep(latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(SEND_MESSAGE), SEND_MESSAGE)
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+    return handle
+
+
+async def burst(request: HTTPXRequest, base_url: str, sends: int) -> tuple[float, int]:
+    """Send `sends` messages at once. Returns the elapsed time and the number of failed sends."""
+    bot = Bot('1:benchmark', base_url=base_url, request=request)
+    await request.initialize()
+    start = perf_counter()
+    results = await asyncio.gather(*(bot.send_message(1, 'x') for _ in range(sends)), return_exceptions=True)
+    elapsed = perf_counter() - start
+    await request.shutdown()
+    return elapsed, sum(isinstance(result, Exception) for result in results)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark a burst of sends against a local fake Bot API.")
+    parser.add_argument('--sends', type=int, default=500, help="messages sent at once (default: 500)")
+    parser.add_argument('--latency', type=float, default=0.3, help="seconds per API call (default: 0.3)")
+    parser.add_argument('--port', type=int, default=8765, help="port of the fake API (default: 8765)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    server = await asyncio.start_server(fake_api(args.latency), '127.0.0.1', args.port, backlog=4096)
+    base_url = f"http://127.0.0.1:{args.port}/bot"
+    print(f"{args.sends} sends at once, {args.latency * 1000:.0f} ms per API call")
+    for name, request in [
+        ('pool 16', HTTPXRequest(connection_pool_size=16)),
+        ('PTB builder default (pool 256)', HTTPXRequest(connection_pool_size=256)),
+        ('build_request()', build_request()),
+    ]:
+        elapsed, failed = await burst(request, base_url, args.sends)
+        sent = args.sends - failed
+        print(f"  {name:<32} sent {sent:>5} in {elapsed:6.2f}s ({sent / elapsed:>6.0f}/s), failed {failed}")
+    server.close()
+    await server.wait_closed()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import tracemalloc
+from datetime import date
+from time import perf_counter
+
+import workers
+from storage import InMemoryStorage, SQLiteStorage, Storage
+
+USERS = 1000
+TEXTS = 5000
+# Shared by all posts with the same text_id, like main_bot's TextStore
+TEXT_BODIES = [f"Scheduled post number {i}" for i in range(TEXTS)]
+
+
+def make_post(i: int) -> dict:
+    """Post shaped like the ones main_bot stores."""
+    return {
+        'text_id': f"{i % TEXTS:032x}",
+        'time': f"{i % 24:02d}:{i % 60:02d}",
+        'user_id': i % USERS,
+        'type': 'Daily',
+        'frequency': 'daily',
+        'day': None,
+        'tz': 'Europe/Kyiv',
+        'target': '@channel',
+        'chat_id': f"@chat{i % 100}",
+        'minutes': [(i * 7) % 1440],
+    }
+
+
+def percentile(samples: list[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+async def measure(name: str, calls: int, op) -> None:
+    """Run `op(i)` `calls` times and print throughput and latency percentiles."""
+    latencies = []
+    start = perf_counter()
+    for i in range(calls):
+        t = perf_counter()
+        await op(i)
+        latencies.append(perf_counter() - t)
+    elapsed = perf_counter() - start
+    print(
+        f"  {name:<18} {calls / elapsed:>10.0f} ops/s"
+        f"  p50 {percentile(latencies, 0.5) * 1e6:>8.1f} us"
+        f"  p99 {percentile(latencies, 0.99) * 1e6:>8.1f} us"
+    )
+
+
+async def memory_used(size: int) -> int:
+    """Bytes an InMemoryStorage allocates for `size` posts and their texts, measured with tracemalloc."""
+    tracemalloc.start()
+    try:
+        storage = InMemoryStorage()
+        for i in range(size):
+            await storage.add_post(f"post_{i}", make_post(i), TEXT_BODIES[i % TEXTS])
+        return tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+
+def disk_used(path: str) -> int:
+    """Size of an SQLite database after moving its write-ahead log into the main file."""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return os.path.getsize(path)
+
+
+def print_size(used: int, size: int) -> None:
+    print(f"  {'size of posts':<18} {used / 2 ** 20:>10.1f} MB      {used / size:>6.0f} B/post")
+
+
+async def run(storage: Storage, size: int, ops: int) -> None:
+    await storage.open()
+    names = [f"post_{i}" for i in range(size)]
+
+    if isinstance(storage, SQLiteStorage):
+        before = disk_used(storage.path)
+        await measure('add_post', size, lambda i: storage.add_post(names[i], make_post(i), TEXT_BODIES[i % TEXTS]))
+        print_size(disk_used(storage.path) - before, size)
+    else:
+        await measure('add_post', size, lambda i: storage.add_post(names[i], make_post(i), TEXT_BODIES[i % TEXTS]))
+        print_size(await memory_used(size), size)
+    ops = min(ops, size)
+    rng = random.Random(1)
+    sample = [rng.randrange(size) for _ in range(ops)]
+    await measure('get_post', ops, lambda i: storage.get_post(names[sample[i]]))
+    await measure('update_post', ops, lambda i: storage.update_post(names[sample[i]], time='12:00'))
+    await measure('list_posts(user)', min(ops, 1000), lambda i: storage.list_posts(user_id=i % USERS))
+    await measure('set_last_seen', ops, lambda i: storage.set_last_seen(i % USERS, date.today()))
+    await measure('add_delivery', ops, lambda i: storage.add_delivery(names[sample[i]], '@chat', i, i))
+    await measure('update_posts(100)', max(1, ops // 100),
+                  lambda i: storage.update_posts(names[i * 100:(i + 1) * 100], paused=True))
+    await measure('delete_post', ops, lambda i: storage.delete_post(names[i]))
+    await storage.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the storage backends.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000],
+                        help="numbers of posts to store (default: 1000 100000 1000000)")
+    parser.add_argument('--ops', type=int, default=10_000, help="operations per measurement (default: 10000)")
+    parser.add_argument('--backends', nargs='+', default=['memory', 'sqlite'], choices=['memory', 'sqlite'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for backend in args.backends:
+                print(f"{backend}, {size} posts:")
+                if backend == 'memory':
+                    storage = InMemoryStorage()
+                else:
+                    storage = SQLiteStorage(os.path.join(tmp, f"bench-{size}.db"))
+                await run(storage, size, args.ops)
+    workers.shutdown()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,139 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+from datetime import datetime
+from time import perf_counter
+
+os.environ.setdefault('BOT_TOKEN', '1:benchmark')
+os.environ.setdefault('CHANNEL_ID', '@benchmark')
+
+from telegram import Chat, Message, Update, User
+from telegram.ext import Application, MessageHandler, filters
+from telegram.request import BaseRequest
+
+from main_bot import SerializedApplication
+
+GET_ME = json.dumps({
+    'ok': True,
+    'result': {'id': 1, 'is_bot': True, 'first_name': 'bench', 'username': 'bench_bot'},
+}).encode()
+
+
+class OfflineRequest(BaseRequest):
+    """Answers every API call with getMe, so the application starts without a network."""
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None, write_timeout=None,
+                         connect_timeout=None, pool_timeout=None):
+        return 200, GET_ME
+
+
+def make_update(update_id: int, user_id: int, text: str) -> Update:
+    message = Message(update_id, datetime.now(), Chat(user_id, 'private'),
+                      from_user=User(user_id, 'user', False), text=text)
+    return Update(update_id, message=message)
+
+
+async def run(app_class: type, concurrency: int | bool, updates: list[Update], round_trip: float) -> dict:
+    """Process `updates` with a handler that takes about `round_trip` seconds (a simulated reply).
+
+    Returns the elapsed time, whether each user's messages were handled in order, and the
+    latency (from queueing to handling) of every update per user.
+    """
+    rng = random.Random(1)
+    handled: dict[int, list[int]] = {}
+    latency: dict[int, list[float]] = {}
+    queued: dict[int, float] = {}
+
+    async def handler(update, context):
+        user_id = update.effective_user.id
+        latency.setdefault(user_id, []).append(perf_counter() - queued[update.update_id])
+        # Replies don't all take equally long, so overlapping updates finish out of order
+        await asyncio.sleep(round_trip * rng.uniform(0.5, 1.5))
+        handled.setdefault(user_id, []).append(int(update.message.text))
+
+    app = (
+        Application.builder()
+        .application_class(app_class)
+        .token('1:benchmark')
+        .request(OfflineRequest())
+        .get_updates_request(OfflineRequest())
+        .concurrent_updates(concurrency)
+        .build()
+    )
+    app.add_handler(MessageHandler(filters.TEXT, handler))
+    await app.initialize()
+    await app.start()
+
+    start = perf_counter()
+    for update in updates:
+        queued[update.update_id] = perf_counter()
+        await app.update_queue.put(update)
+    await app.update_queue.join()
+    elapsed = perf_counter() - start
+
+    await app.stop()
+    await app.shutdown()
+    return {
+        'elapsed': elapsed,
+        'ordered': all(texts == sorted(texts) for texts in handled.values()),
+        'latency': latency,
+    }
+
+
+CONFIGURATIONS = [
+    ('sequential', Application, False),
+    ('concurrent, unordered', Application, 32),
+    ('concurrent, serialized', SerializedApplication, 32),
+]
+
+
+async def throughput(users: int, per_user: int, round_trip: float) -> None:
+    """Many users sending a few messages each."""
+    updates = [
+        make_update(i * users + user_id, user_id, str(i))
+        for i in range(per_user) for user_id in range(1, users + 1)
+    ]
+    print(f"Throughput: {users} users x {per_user} messages, {round_trip * 1000:.0f} ms per reply")
+    for name, app_class, concurrency in CONFIGURATIONS:
+        result = await run(app_class, concurrency, updates, round_trip)
+        print(f"  {name:<24} {len(updates) / result['elapsed']:>8.0f} updates/s"
+              f"  per-user order kept: {result['ordered']}")
+
+
+async def burst(burst_size: int, others: int, round_trip: float) -> None:
+    """One user sends a burst; other users send one message each right after it."""
+    updates = [make_update(i + 1, 1, str(i)) for i in range(burst_size)]
+    updates += [make_update(burst_size + i + 1, 100 + i, '0') for i in range(others)]
+    print(f"Burst: 1 user x {burst_size} messages, then {others} other users x 1 message")
+    for name, app_class, concurrency in CONFIGURATIONS[1:]:
+        result = await run(app_class, concurrency, updates, round_trip)
+        other = sorted(t for user_id, times in result['latency'].items() if user_id != 1 for t in times)
+        print(f"  {name:<24} other users' latency p50 {other[len(other) // 2] * 1000:>7.1f} ms"
+              f"  max {other[-1] * 1000:>7.1f} ms  burst order kept: {result['ordered']}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent update processing.")
+    parser.add_argument('--users', type=int, default=50, help="users in the throughput run (default: 50)")
+    parser.add_argument('--per-user', type=int, default=4, help="messages per user (default: 4)")
+    parser.add_argument('--burst', type=int, default=64, help="messages in the burst run (default: 64)")
+    parser.add_argument('--round-trip', type=float, default=0.05,
+                        help="seconds each handler waits, like a reply (default: 0.05)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    await throughput(args.users, args.per_user, args.round_trip)
+    await burst(args.burst, args.users, args.round_trip)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
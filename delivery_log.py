@@ -0,0 +1,128 @@
+import time
+from typing import Iterable
+
+from storage import Delivery
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Upper bounds (seconds) of the lateness histogram bins; the last bin is open-ended
+LATENESS_BINS = (1, 2, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+class Rollup:
+    """Delivery counts and a lateness histogram for one time bucket."""
+
+    __slots__ = ('sent', 'failed', 'histogram')
+
+    def __init__(self) -> None:
+        self.sent = 0
+        self.failed = 0
+        self.histogram = [0] * (len(LATENESS_BINS) + 1)
+
+    def add(self, lateness: float, ok: bool) -> None:
+        if not ok:
+            self.failed += 1
+            return
+        self.sent += 1
+        for i, bound in enumerate(LATENESS_BINS):
+            if lateness <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def merge(self, other: 'Rollup') -> None:
+        self.sent += other.sent
+        self.failed += other.failed
+        for i, count in enumerate(other.histogram):
+            self.histogram[i] += count
+
+    @property
+    def total(self) -> int:
+        return self.sent + self.failed
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failed / self.total if self.total else 0.0
+
+    def lateness_percentile(self, q: float) -> float | None:
+        """Upper bound (seconds) of the bin holding the q-th percentile of lateness.
+
+        Returns None when nothing was delivered, and inf when it falls in the open-ended bin.
+        """
+        if not self.sent:
+            return None
+        rank = q * self.sent
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank:
+                return LATENESS_BINS[i] if i < len(LATENESS_BINS) else float('inf')
+        return float('inf')
+
+
+class DeliveryLog:
+    """Hourly and daily delivery rollups kept up to date in memory.
+
+    The raw delivery records live in the storage backend; the rollups are rebuilt from
+    them at startup with load(). Queries only read the rollups, never the raw records.
+    """
+
+    def __init__(self, hourly_retention: int = 48, daily_retention: int = 30) -> None:
+        self.hourly_retention = hourly_retention
+        self.daily_retention = daily_retention
+        # bucket start (epoch seconds) -> chat id -> rollup
+        self._hourly: dict[int, dict[str, Rollup]] = {}
+        self._daily: dict[int, dict[str, Rollup]] = {}
+
+    def record(self, chat_id: int | str, scheduled: float, sent: float, error: str | None = None) -> None:
+        """Add a delivery to the rollups."""
+        lateness = max(0.0, sent - scheduled)
+        chat_id = str(chat_id)
+        for buckets, size, retention in (
+            (self._hourly, HOUR, self.hourly_retention),
+            (self._daily, DAY, self.daily_retention),
+        ):
+            start = int(sent) // size * size
+            if start not in buckets:
+                buckets[start] = {}
+                # A new bucket means time moved on: drop the ones past retention
+                cutoff = start - retention * size
+                for old in [b for b in buckets if b <= cutoff]:
+                    del buckets[old]
+            chats = buckets[start]
+            if chat_id not in chats:
+                chats[chat_id] = Rollup()
+            chats[chat_id].add(lateness, error is None)
+
+    def load(self, records: Iterable[Delivery]) -> int:
+        """Rebuild the rollups from stored delivery records. Returns the number of records used."""
+        loaded = 0
+        for scheduled, sent, chat_id, _job_name, error in records:
+            self.record(chat_id, scheduled, sent, error)
+            loaded += 1
+        return loaded
+
+    def since(self) -> float:
+        """Oldest send time the rollups keep, for fetching the records to load()."""
+        return time.time() - self.daily_retention * DAY
+
+    def summary(self, hours: int, now: float | None = None) -> Rollup:
+        """All deliveries of the last `hours` hours (hourly buckets)."""
+        start = (int(now or time.time()) // HOUR - hours + 1) * HOUR
+        total = Rollup()
+        for bucket, chats in self._hourly.items():
+            if bucket >= start:
+                for rollup in chats.values():
+                    total.merge(rollup)
+        return total
+
+    def chat_summaries(self, days: int, now: float | None = None) -> dict[str, Rollup]:
+        """Deliveries per chat over the last `days` days (daily buckets)."""
+        start = (int(now or time.time()) // DAY - days + 1) * DAY
+        per_chat: dict[str, Rollup] = {}
+        for bucket, chats in self._daily.items():
+            if bucket >= start:
+                for chat_id, rollup in chats.items():
+                    per_chat.setdefault(chat_id, Rollup()).merge(rollup)
+        return per_chat
@@ -1,11 +1,24 @@
+import startup  # first import: starts the startup clock before the heavy imports below
+
+import asyncio
+import io
+import json
 import logging
+import os
 import re
-from datetime import datetime, timedelta, date, timezone
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta, time, timezone
+from functools import lru_cache
 from typing import Any
-from zoneinfo import ZoneInfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+from apscheduler.events import EVENT_JOB_SUBMITTED, JobSubmissionEvent
+import httpx
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
-from telegram.error import TelegramError
+from telegram.error import BadRequest, ChatMigrated, Forbidden, NetworkError, RetryAfter, TelegramError
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -14,11 +27,17 @@ from telegram.ext import (
     filters,
     ContextTypes,
     Defaults,
+    JobQueue,
 )
+from telegram.request import HTTPXRequest
 
 import settings
+import workers
+from delivery_log import DeliveryLog
+from storage import Storage, create_storage
+from text_store import TextStore
 
-settings.validate_config()
+startup.mark('imports')
 
 
 class TokenFilter(logging.Filter):
@@ -38,20 +57,23 @@ class TokenFilter(logging.Filter):
         return True
 
 
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=getattr(logging, settings.LOG_LEVEL, logging.INFO)
-)
+def setup_logging() -> None:
+    """Configure logging. Called from main() rather than at import time."""
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=getattr(logging, settings.LOG_LEVEL, logging.INFO)
+    )
 
-# Mask tokens in all loggers (especially httpx)
-for handler in logging.root.handlers:
-    handler.addFilter(TokenFilter())
+    # Mask tokens in all loggers (especially httpx)
+    for handler in logging.root.handlers:
+        handler.addFilter(TokenFilter())
 
-# Reduce httpx verbosity (optional: change to WARNING to hide all HTTP logs)
-logging.getLogger("httpx").setLevel(logging.WARNING)
+    # Reduce httpx verbosity (optional: change to WARNING to hide all HTTP logs)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    # Enable apscheduler debug logging
+    logging.getLogger("apscheduler").setLevel(logging.DEBUG)
 
-# Enable apscheduler debug logging
-logging.getLogger("apscheduler").setLevel(logging.DEBUG)
 
 logger = logging.getLogger(__name__)
 
@@ -67,22 +89,113 @@ WAITING_FOR_EDIT_TIME = 7
 WAITING_FOR_BATCH_TEXT = 8
 WAITING_FOR_BATCH_TIME = 9
 WAITING_FOR_BATCH_FREQUENCY = 10
-
-# Timezone
-TZ = ZoneInfo("Europe/Kyiv")
+WAITING_FOR_IMPORT_FILE = 11
 
 # Display limits
 MAX_PREVIEW_LENGTH = 50
 MAX_DISPLAY_LENGTH = 100
 MAX_POST_LENGTH = 4096
 
-scheduled_posts: dict[str, dict[str, Any]] = {}
-user_last_interaction: dict[int, date] = {}
+# BadRequest messages meaning the chat itself can't be posted to
+DEAD_CHAT_ERRORS = (
+    'chat not found',
+    'chat_write_forbidden',
+    'not enough rights',
+    'have no rights to send',
+    'need administrator rights',
+    'group chat was deactivated',
+    'peer_id_invalid',
+)
+
+# How far (in minutes) to look around a fully booked minute for a free one
+FREE_SLOT_SEARCH_MINUTES = 120
+MINUTES_PER_DAY = 24 * 60
+
+# Frequencies
+FREQUENCY_KEYBOARD = [["Once", "Daily"], ["Weekdays", "Weekly"], ["Monthly", "Every 6 hours"]]
+FREQUENCY_PROMPT = "Please choose a frequency from the keyboard, or type 'Every N hours' (N = 1-24)"
+EVERY_N_HOURS_PATTERN = re.compile(r'^every\s+(\d{1,2})\s*h(?:ours?)?$')
+WEEKDAY_NAMES = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+# Posts, user activity and delivery records; posts are keyed by job name. Created by main()
+# once the settings are validated
+storage: Storage | None = None
+# Post texts, shared by all posts and jobs with identical content
+post_texts = TextStore()
+# Post counters for quotas, maintained by add_post/remove_post
+user_post_counts: Counter = Counter()
+chat_post_counts: Counter = Counter()
+# Posts per UTC minute of the day they fire in
+minute_post_counts: Counter = Counter()
+deliveries = DeliveryLog()
+# Timezone names keyed by chat id (user id in private chats, group id in groups)
+chat_timezones: dict[int, str] = {}
+_timezones_file_lock = threading.Lock()
+# Snapshot numbers: taken in order on the event loop, saved in any order by the I/O threads
+_timezones_version = 0
+_timezones_saved_version = 0
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """Resolve a timezone name. Raises ZoneInfoNotFoundError/ValueError for unknown names."""
+    return ZoneInfo(name)
+
+
+def get_timezone_name(update: Update) -> str:
+    """Timezone for an update: the group's, then the user's, then the bot default."""
+    chat = update.effective_chat
+    if chat and chat.id in chat_timezones:
+        return chat_timezones[chat.id]
+    user = update.effective_user
+    if user and user.id in chat_timezones:
+        return chat_timezones[user.id]
+    return settings.TIMEZONE
 
 
-def get_daily_greeting() -> str:
-    """Get greeting based on time of day."""
-    hour = datetime.now().hour
+def load_timezones() -> None:
+    """Load saved timezones from disk."""
+    try:
+        with open(settings.TIMEZONES_FILE, encoding='utf-8') as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load timezones from {settings.TIMEZONES_FILE}: {e}")
+        return
+    chat_timezones.update({int(chat_id): name for chat_id, name in saved.items()})
+    logger.info(f"Loaded {len(chat_timezones)} timezone setting(s)")
+
+
+def snapshot_timezones() -> tuple[dict[int, str], int]:
+    """Copy of the timezones and its snapshot number, to be passed to save_timezones()."""
+    global _timezones_version
+    _timezones_version += 1
+    return dict(chat_timezones), _timezones_version
+
+
+def save_timezones(timezones: dict[int, str], version: int) -> None:
+    """Save a snapshot of timezones to disk. Blocking; run it through workers.run_io.
+
+    A snapshot older than the one already saved is skipped, so the newest one always wins.
+    """
+    global _timezones_saved_version
+    tmp_path = f"{settings.TIMEZONES_FILE}.tmp"
+    try:
+        with _timezones_file_lock:
+            if version <= _timezones_saved_version:
+                return
+            _timezones_saved_version = version
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({str(chat_id): name for chat_id, name in timezones.items()}, f)
+            os.replace(tmp_path, settings.TIMEZONES_FILE)
+    except OSError as e:
+        logger.error(f"Could not save timezones to {settings.TIMEZONES_FILE}: {e}")
+
+
+def get_daily_greeting(tz: ZoneInfo | None = None) -> str:
+    """Get greeting based on time of day (in the bot default timezone unless `tz` is given)."""
+    hour = datetime.now(tz or get_zone(settings.TIMEZONE)).hour
     if 5 <= hour < 12:
         return "Good morning"
     elif 12 <= hour < 18:
@@ -96,9 +209,306 @@ def truncate(text: str, length: int) -> str:
     return text[:length] + '...' if len(text) > length else text
 
 
+def fire_minutes(time_str: str, tz_name: str, frequency: str) -> list[int]:
+    """UTC minutes of the day (0-1439) a post fires in.
+
+    Interval rules that divide the day fire in several minutes; other interval rules drift
+    from day to day and are counted at their first run only.
+    """
+    hour, minute = map(int, time_str.split(':'))
+    local = datetime.now(get_zone(tz_name)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+    utc = local.astimezone(timezone.utc)
+    first = utc.hour * 60 + utc.minute
+    if frequency.startswith('every_'):
+        hours = int(frequency[len('every_'):-1])
+        if 24 % hours == 0:
+            return [(first + k * hours * 60) % MINUTES_PER_DAY for k in range(24 // hours)]
+    return [first]
+
+
+def _bump(counter: Counter, key: Any, delta: int) -> None:
+    """Change a counter, dropping keys that reach zero so counters stay small."""
+    value = counter[key] + delta
+    if value > 0:
+        counter[key] = value
+    else:
+        del counter[key]
+
+
+def _count_post(post: dict[str, Any], delta: int) -> None:
+    """Add (delta=1) or remove (delta=-1) a post from the quota counters."""
+    _bump(user_post_counts, post['user_id'], delta)
+    _bump(chat_post_counts, post['chat_id'], delta)
+    for minute in post['minutes']:
+        _bump(minute_post_counts, minute, delta)
+
+
+async def add_post(job_name: str, post: dict[str, Any]) -> None:
+    """Register a scheduled post. The post must reference its text by 'text_id'."""
+    # Stored so removal releases the same buckets even if the UTC offset changed meanwhile
+    post['minutes'] = fire_minutes(post['time'], post['tz'], post['frequency'])
+    # Counted before the first await, so concurrent quota checks already see the post
+    _count_post(post, 1)
+    try:
+        # Texts are stored once per content, so the post can be restored after a restart
+        await storage.add_post(job_name, post, post_texts.get(post['text_id']))
+    except Exception:
+        _count_post(post, -1)
+        raise
+
+
+async def remove_posts(job_names: list[str]) -> list[tuple[str, dict[str, Any]]]:
+    """Unregister scheduled posts in one batch and release their texts. Returns the removed posts."""
+    removed = await storage.delete_posts(job_names)
+    for _, post in removed:
+        post_texts.release(post['text_id'])
+        _count_post(post, -1)
+    return removed
+
+
+async def remove_post(job_name: str) -> dict[str, Any] | None:
+    """Unregister a scheduled post and release its text. Returns the removed post, if any."""
+    removed = await remove_posts([job_name])
+    return removed[0][1] if removed else None
+
+
+async def set_post_time(job_name: str, time_str: str) -> bool:
+    """Change the time of a registered post, moving it to its new minute buckets.
+
+    Returns False if the post doesn't exist (anymore).
+    """
+    post = await storage.get_post(job_name)
+    if post is None:
+        return False
+    minutes = fire_minutes(time_str, post['tz'], post['frequency'])
+    if not await storage.update_post(job_name, time=time_str, minutes=minutes):
+        return False
+    _count_post(post, -1)
+    _count_post({**post, 'minutes': minutes}, 1)
+    return True
+
+
+def check_quota(user_id: int, chat_id: int | str, count: int = 1) -> str | None:
+    """Check per-user and per-chat quotas for `count` new posts. Returns an error message or None."""
+    if settings.MAX_POSTS_PER_USER and user_post_counts[user_id] + count > settings.MAX_POSTS_PER_USER:
+        return (
+            f"You can have at most {settings.MAX_POSTS_PER_USER} scheduled posts "
+            f"(you have {user_post_counts[user_id]}). Delete some with /delete first."
+        )
+    if settings.MAX_POSTS_PER_CHAT and chat_post_counts[chat_id] + count > settings.MAX_POSTS_PER_CHAT:
+        return (
+            f"This chat can have at most {settings.MAX_POSTS_PER_CHAT} scheduled posts "
+            f"(it has {chat_post_counts[chat_id]})."
+        )
+    return None
+
+
+def minutes_available(minutes: list[int], count: int = 1, moving: list[int] = ()) -> bool:
+    """Whether `count` more posts fit in every one of the given minute buckets.
+
+    `moving` are the buckets of a post being moved, which it frees when it moves.
+    """
+    if not settings.MAX_POSTS_PER_MINUTE:
+        return True
+    return all(
+        minute_post_counts[m] - moving.count(m) + count <= settings.MAX_POSTS_PER_MINUTE for m in minutes
+    )
+
+
+def find_free_time(
+    time_str: str, tz_name: str, frequency: str, count: int = 1, moving: list[int] = ()
+) -> str | None:
+    """Nearest time (HH:MM, local) to `time_str` whose minute buckets have room for `count` posts."""
+    hour, minute = map(int, time_str.split(':'))
+    base = hour * 60 + minute
+    for offset in range(1, FREE_SLOT_SEARCH_MINUTES + 1):
+        for candidate in ((base + offset) % MINUTES_PER_DAY, (base - offset) % MINUTES_PER_DAY):
+            candidate_str = f"{candidate // 60:02d}:{candidate % 60:02d}"
+            if minutes_available(fire_minutes(candidate_str, tz_name, frequency), count, moving):
+                return candidate_str
+    return None
+
+
+def time_booked_message(
+    time_str: str, tz_name: str, frequency: str, count: int = 1, moving: list[int] = ()
+) -> str:
+    """Message for a fully booked time, suggesting the nearest free one."""
+    free_time = find_free_time(time_str, tz_name, frequency, count, moving)
+    suggestion = f"Nearest free time: {free_time}." if free_time else "No free time nearby."
+    return (
+        f"{time_str} is fully booked right now. {suggestion}\n"
+        "Please enter another time (HH:MM):"
+    )
+
+
+def post_preview(post: dict[str, Any], length: int = MAX_PREVIEW_LENGTH) -> str:
+    """Truncated text of a post for listings."""
+    return truncate(post_texts.get(post['text_id']), length)
+
+
+def format_post_line(num: int, post: dict[str, Any]) -> str:
+    """One numbered line of a post listing."""
+    target = post.get('target', settings.CHANNEL_ID)
+    paused = " (paused)" if post.get('paused') else ""
+    return f"{num}. [{post['time']} - {post['type']}]{paused} ({target}) {post_preview(post)}\n"
+
+
 def count_user_posts(user_id: int) -> int:
     """Count scheduled posts for a user."""
-    return sum(1 for data in scheduled_posts.values() if data['user_id'] == user_id)
+    return user_post_counts[user_id]
+
+
+def parse_frequency(text: str) -> str | None:
+    """Parse user input into a frequency rule ('once', 'daily', 'weekdays', 'weekly', 'monthly', 'every_Nh')."""
+    text = text.strip().lower()
+    if text in ('once', 'daily', 'weekdays', 'weekly', 'monthly'):
+        return text
+    match = EVERY_N_HOURS_PATTERN.match(text)
+    if match and 1 <= int(match.group(1)) <= 24:
+        return f"every_{int(match.group(1))}h"
+    return None
+
+
+def frequency_label(frequency: str, day: int | None = None) -> str:
+    """Human-readable label for a frequency rule."""
+    if frequency == 'weekly':
+        return f"Weekly ({WEEKDAY_NAMES[day]})"
+    if frequency == 'monthly':
+        return "Monthly (last day)" if day == -1 else f"Monthly (day {day})"
+    if frequency.startswith('every_'):
+        return f"Every {frequency[len('every_'):-1]}h"
+    return frequency.capitalize()
+
+
+def parse_day(frequency: str, value: Any) -> int | None:
+    """Validate the anchor day of an imported post. Raises ValueError for an invalid one.
+
+    Weekly posts take a weekday (0 = Monday), monthly ones a day of month (-1 = last day);
+    other frequencies have no anchor day.
+    """
+    if frequency not in ('weekly', 'monthly') or value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"day must be a number, got {value!r}")
+    if frequency == 'weekly':
+        if not 0 <= value <= 6:
+            raise ValueError(f"weekly day must be 0-6 (Monday-Sunday), got {value}")
+        return value
+    if value != -1 and not 1 <= value <= 31:
+        raise ValueError(f"monthly day must be 1-31 or -1 (last day), got {value}")
+    # Same rule as schedule_post_job: days 29-31 run on the last day of the month
+    return -1 if value > 28 else value
+
+
+def next_occurrence(post_time: time, now: datetime) -> datetime:
+    """Next occurrence of a wall-clock time, today or tomorrow.
+
+    Arithmetic is done on aware datetimes, so the same wall-clock time is kept across DST changes.
+    """
+    target = now.replace(hour=post_time.hour, minute=post_time.minute, second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return target
+
+
+def schedule_post_job(
+    job_queue: JobQueue,
+    frequency: str,
+    post_time: time,
+    job_data: dict[str, Any],
+    job_name: str,
+    tz: ZoneInfo | None = None,
+    day: int | None = None,
+) -> int | None:
+    """Register a post job for a frequency rule in the given timezone.
+
+    Weekly and monthly rules are anchored to the weekday / day of month of the first occurrence
+    unless `day` is given. Returns the anchor day (None for other rules) so it can be stored
+    with the post and reused when the post is rescheduled.
+
+    Fixed instants (one-time posts, the first run of interval rules) are converted to UTC here;
+    calendar rules keep their zone so the trigger follows DST. Without `tz` the bot default is used.
+    """
+    tz = tz or get_zone(settings.TIMEZONE)
+    first = next_occurrence(post_time, datetime.now(tz))
+    post_time = post_time.replace(tzinfo=tz)
+
+    if frequency == 'once':
+        job_queue.run_once(
+            send_scheduled_post_once,
+            when=first.astimezone(timezone.utc),
+            data=job_data,
+            name=job_name,
+        )
+    elif frequency == 'daily':
+        job_queue.run_daily(send_scheduled_post, time=post_time, data=job_data, name=job_name)
+    elif frequency == 'weekdays':
+        # PTB numbers days of the week from Sunday (0) to Saturday (6)
+        job_queue.run_daily(
+            send_scheduled_post, time=post_time, days=(1, 2, 3, 4, 5), data=job_data, name=job_name
+        )
+    elif frequency == 'weekly':
+        if day is None:
+            day = first.weekday()
+        job_queue.run_daily(
+            send_scheduled_post, time=post_time, days=((day + 1) % 7,), data=job_data, name=job_name
+        )
+    elif frequency == 'monthly':
+        if day is None:
+            day = first.day
+            # Days 29-31 don't exist in every month; run on the last day instead of skipping months
+            if day > 28:
+                day = -1
+        job_queue.run_monthly(send_scheduled_post, when=post_time, day=day, data=job_data, name=job_name)
+    else:
+        hours = int(frequency[len('every_'):-1])
+        job_queue.run_repeating(
+            send_scheduled_post,
+            interval=timedelta(hours=hours),
+            first=first.astimezone(timezone.utc),
+            data=job_data,
+            name=job_name,
+        )
+    return day
+
+
+async def create_post(
+    job_queue: JobQueue,
+    job_name: str,
+    text: str,
+    time_str: str,
+    frequency: str,
+    tz_name: str,
+    user_id: int,
+    chat_id: int | str,
+    target: str,
+    day: int | None = None,
+) -> dict[str, Any]:
+    """Store the text, schedule the job and register a post. Returns the post."""
+    text_id = post_texts.add(text)
+    job_data = {'text_id': text_id, 'chat_id': chat_id, 'job_name': job_name}
+    post_time = datetime.strptime(time_str, "%H:%M").time()
+    try:
+        day = schedule_post_job(job_queue, frequency, post_time, job_data, job_name, tz=get_zone(tz_name), day=day)
+        post = {
+            'text_id': text_id,
+            'time': time_str,
+            'user_id': user_id,
+            'type': frequency_label(frequency, day),
+            'frequency': frequency,
+            'day': day,
+            'tz': tz_name,
+            'target': target,
+            'chat_id': chat_id,
+        }
+        await add_post(job_name, post)
+    except Exception:
+        # Leave no job or text reference behind for a post that wasn't registered
+        for job in job_queue.get_jobs_by_name(job_name):
+            job.schedule_removal()
+        post_texts.release(text_id)
+        raise
+    return post
 
 
 async def check_daily_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
@@ -108,13 +518,14 @@ async def check_daily_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     user_id = update.effective_user.id
     user_name = update.effective_user.username or update.effective_user.first_name or "there"
-    today = date.today()
+    tz = get_zone(get_timezone_name(update))
+    today = datetime.now(tz).date()
 
-    last_date = user_last_interaction.get(user_id)
-    user_last_interaction[user_id] = today
+    last_date = await storage.get_last_seen(user_id)
 
     if last_date != today:
-        greeting = get_daily_greeting()
+        await storage.set_last_seen(user_id, today)
+        greeting = get_daily_greeting(tz)
         await update.message.reply_text(
             f"{greeting}, {user_name}! Welcome back!\n\n"
             f"You have {count_user_posts(user_id)} scheduled post(s).\n"
@@ -135,6 +546,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "/list - View scheduled posts\n"
         "/edit - Edit a scheduled post\n"
         "/delete - Delete a scheduled post\n"
+        "/timezone - Show or set your timezone\n"
         "/cancel - Cancel current operation"
     )
 
@@ -152,6 +564,12 @@ async def schedule_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await check_daily_welcome(update, context)
 
     chat_id, chat_name = get_target_chat(update)
+
+    quota_error = check_quota(update.effective_user.id, chat_id)
+    if quota_error:
+        await update.message.reply_text(quota_error)
+        return ConversationHandler.END
+
     context.user_data['target_chat_id'] = chat_id
     context.user_data['target_chat_name'] = chat_name
 
@@ -200,25 +618,28 @@ async def receive_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return WAITING_FOR_TIME
 
+    tz_name = get_timezone_name(update)
+    if not minutes_available(fire_minutes(time_str, tz_name, 'once')):
+        await update.message.reply_text(time_booked_message(time_str, tz_name, 'once'))
+        return WAITING_FOR_TIME
+
     context.user_data['post_time'] = time_str
 
-    keyboard = [["Once", "Daily"]]
     await update.message.reply_text(
         "How often should this post be sent?",
-        reply_markup=ReplyKeyboardMarkup(keyboard, one_time_keyboard=True)
+        reply_markup=ReplyKeyboardMarkup(FREQUENCY_KEYBOARD, one_time_keyboard=True)
     )
     return WAITING_FOR_FREQUENCY
 
 
 async def receive_frequency(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Receive frequency and schedule the post."""
-    frequency = update.message.text.strip().lower()
+    frequency = parse_frequency(update.message.text)
 
-    if frequency not in ['once', 'daily']:
-        keyboard = [["Once", "Daily"]]
+    if frequency is None:
         await update.message.reply_text(
-            "Please choose 'Once' or 'Daily'",
-            reply_markup=ReplyKeyboardMarkup(keyboard, one_time_keyboard=True)
+            FREQUENCY_PROMPT,
+            reply_markup=ReplyKeyboardMarkup(FREQUENCY_KEYBOARD, one_time_keyboard=True)
         )
         return WAITING_FOR_FREQUENCY
 
@@ -227,50 +648,33 @@ async def receive_frequency(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target_chat_id = context.user_data.get('target_chat_id', settings.CHANNEL_ID)
     target_chat_name = context.user_data.get('target_chat_name', str(settings.CHANNEL_ID))
     user_id = update.effective_user.id
+    tz_name = get_timezone_name(update)
 
-    job_name = f"post_{user_id}_{datetime.now().timestamp()}"
-    post_time = datetime.strptime(time_str, "%H:%M").time()
-    job_data = {'text': post_text, 'chat_id': target_chat_id, 'job_name': job_name}
-
-    if frequency == 'daily':
-        context.job_queue.run_daily(
-            send_scheduled_post,
-            time=post_time,
-            data=job_data,
-            name=job_name,
+    # Counters may have changed while the user was typing
+    quota_error = check_quota(user_id, target_chat_id)
+    if quota_error:
+        await update.message.reply_text(quota_error, reply_markup=ReplyKeyboardRemove())
+        context.user_data.clear()
+        return ConversationHandler.END
+    if not minutes_available(fire_minutes(time_str, tz_name, frequency)):
+        await update.message.reply_text(
+            time_booked_message(time_str, tz_name, frequency),
+            reply_markup=ReplyKeyboardRemove()
         )
-        freq_display = "Daily"
-    else:
-        now = datetime.now(TZ)
-        target = now.replace(hour=post_time.hour, minute=post_time.minute, second=0, microsecond=0)
-        if target <= now:
-            target += timedelta(days=1)
-
-        logger.info(f"DEBUG: now={now}, target={target}, diff={(target-now).total_seconds()}s")
+        return WAITING_FOR_TIME
 
-        context.job_queue.run_once(
-            send_scheduled_post_once,
-            when=target,
-            data=job_data,
-            name=job_name,
-        )
-        freq_display = "Once"
-
-    scheduled_posts[job_name] = {
-        'text': truncate(post_text, MAX_PREVIEW_LENGTH),
-        'full_text': post_text,
-        'time': time_str,
-        'user_id': user_id,
-        'type': freq_display,
-        'target': target_chat_name,
-        'chat_id': target_chat_id,
-    }
+    job_name = f"post_{user_id}_{datetime.now().timestamp()}"
+    post = await create_post(
+        context.job_queue, job_name, post_text, time_str, frequency, tz_name,
+        user_id, target_chat_id, target_chat_name,
+    )
+    freq_display = post['type']
 
-    logger.info(f"Post scheduled by user {user_id}: [{time_str}, {freq_display}] -> {target_chat_name}")
+    logger.info(f"Post scheduled by user {user_id}: [{time_str} {tz_name}, {freq_display}] -> {target_chat_name}")
 
     await update.message.reply_text(
         f"Post scheduled!\n\n"
-        f"Time: {time_str} ({freq_display})\n"
+        f"Time: {time_str} {tz_name} ({freq_display})\n"
         f"Text: {truncate(post_text, MAX_DISPLAY_LENGTH)}\n\n"
         f"The post will be sent to {target_chat_name}",
         reply_markup=ReplyKeyboardRemove()
@@ -280,38 +684,205 @@ async def receive_frequency(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ConversationHandler.END
 
 
-async def send_scheduled_post(context: ContextTypes.DEFAULT_TYPE):
-    """Send the scheduled post to the channel (daily)."""
+# Time each job run was due, keyed by scheduler job id: set by remember_run_time when the
+# scheduler submits the run (before the callback starts) and taken by the callback
+_run_times: dict[str, datetime] = {}
+
+
+def remember_run_time(event: JobSubmissionEvent) -> None:
+    """Scheduler listener keeping the time a submitted job run was scheduled for."""
+    _run_times[event.job_id] = event.scheduled_run_times[-1]
+
+
+def scheduled_run_time(context: ContextTypes.DEFAULT_TYPE) -> float:
+    """When the current send was due (epoch seconds). Retries keep the time of the first attempt."""
+    run_time = _run_times.pop(context.job.job.id, None)
+    if 'scheduled' in context.job.data:
+        return context.job.data['scheduled']
+    return (run_time or datetime.now(timezone.utc)).timestamp()
+
+
+async def record_delivery(job_data: dict[str, Any], scheduled: float, error: str | None = None) -> None:
+    """Store the outcome of a send and add it to the delivery rollups."""
+    sent = datetime.now(timezone.utc).timestamp()
+    job_name = job_data.get('job_name', '')
+    deliveries.record(job_data['chat_id'], scheduled, sent, error)
+    await storage.add_delivery(job_name, job_data['chat_id'], scheduled, sent, error)
+
+
+async def prune_deliveries(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Delete stored delivery records older than the daily rollups keep."""
+    pruned = await storage.prune_deliveries(deliveries.since())
+    if pruned:
+        logger.info(f"Pruned {pruned} delivery record(s)")
+
+
+def classify_error(error: TelegramError) -> str:
+    """Classify a send error as 'dead_chat', 'migrated', 'permanent', 'rate_limit' or 'transient'.
+
+    'dead_chat' errors will fail for every post to the chat (bot kicked, chat deleted),
+    'migrated' means the group became a supergroup with a new id, 'permanent' errors will
+    fail again for this post, the other two are worth retrying.
+    """
+    if isinstance(error, RetryAfter):
+        return 'rate_limit'
+    if isinstance(error, ChatMigrated):
+        return 'migrated'
+    if isinstance(error, Forbidden):
+        return 'dead_chat'
+    # BadRequest subclasses NetworkError, so it has to be checked first
+    if isinstance(error, BadRequest):
+        message = error.message.lower()
+        if any(fragment in message for fragment in DEAD_CHAT_ERRORS):
+            return 'dead_chat'
+        return 'permanent'
+    if isinstance(error, NetworkError):
+        return 'transient'
+    return 'permanent'
+
+
+def retry_delay(error: TelegramError, attempt: int) -> float:
+    """Seconds to wait before retry number `attempt` (1-based)."""
+    if isinstance(error, RetryAfter):
+        return float(error.retry_after)
+    if isinstance(error, ChatMigrated):
+        return 0.0
+    return min(settings.RETRY_BASE_DELAY * 2 ** (attempt - 1), settings.RETRY_MAX_DELAY)
+
+
+async def pause_chat_posts(context: ContextTypes.DEFAULT_TYPE, chat_id: int | str, reason: str) -> None:
+    """Pause every post to a chat that can't be posted to, and tell the owners."""
+    posts = [
+        (name, post) for name, post in await storage.list_posts(chat_id=chat_id)
+        if not post.get('paused')
+    ]
+    owners: dict[int, str] = {post['user_id']: post['target'] for _, post in posts}
+    await set_posts_paused(posts, context.job_queue, True)
+    logger.warning(f"Paused {len(posts)} post(s) to chat {chat_id}: {reason}")
+
+    for user_id, target in owners.items():
+        try:
+            await context.bot.send_message(
+                chat_id=user_id,
+                text=(
+                    f"Your scheduled posts to {target} were paused because the bot "
+                    f"can't post there anymore: {reason}\n\n"
+                    "Give the bot access to the chat again and ask the admin to resume them, "
+                    "or remove them with /delete."
+                )
+            )
+        except TelegramError as e:
+            logger.info(f"Could not notify user {user_id} about paused posts: {e}")
+
+
+async def migrate_chat_posts(context: ContextTypes.DEFAULT_TYPE, old_chat_id: int | str, new_chat_id: int) -> None:
+    """Point every post (and the timezone) of a group that became a supergroup to its new id."""
+    posts = await storage.list_posts(chat_id=old_chat_id)
+    job_names = [name for name, _ in posts]
+    await storage.update_posts(job_names, chat_id=new_chat_id)
+    for _, post in posts:
+        _count_post(post, -1)
+        _count_post({**post, 'chat_id': new_chat_id}, 1)
+
+    jobs = jobs_by_name(context.job_queue)
+    for job_name in job_names:
+        for job in jobs.get(job_name, ()):
+            job.data['chat_id'] = new_chat_id
+
+    if old_chat_id in chat_timezones:
+        chat_timezones[new_chat_id] = chat_timezones.pop(old_chat_id)
+        await workers.run_io(save_timezones, *snapshot_timezones())
+    logger.info(f"Chat {old_chat_id} migrated to {new_chat_id}: moved {len(posts)} post(s)")
+
+
+async def handle_send_error(
+    context: ContextTypes.DEFAULT_TYPE, job_data: dict[str, Any], error: TelegramError, once: bool,
+    scheduled: float,
+) -> None:
+    """Retry, give up on, or pause the chat of a failed send depending on the error.
+
+    Only a send that won't be retried is recorded as failed, so a post delivered on a retry
+    counts once, as sent. A one-time post that won't be sent anymore is removed: its job has
+    already run.
+    """
+    category = classify_error(error)
+    job_name = job_data.get('job_name')
+
+    if category == 'dead_chat':
+        await record_delivery(job_data, scheduled, str(error))
+        await pause_chat_posts(context, job_data['chat_id'], str(error))
+        if once and job_name:
+            await remove_post(job_name)
+        return
+    if category == 'permanent':
+        await record_delivery(job_data, scheduled, str(error))
+        logger.error(f"Telegram error sending post {job_name} (not retried): {error}")
+        if once and job_name:
+            await remove_post(job_name)
+        return
+    if category == 'migrated':
+        await migrate_chat_posts(context, job_data['chat_id'], error.new_chat_id)
+        job_data = {**job_data, 'chat_id': error.new_chat_id}
+
+    attempt = job_data.get('attempt', 0) + 1
+    if attempt > settings.RETRY_MAX_ATTEMPTS:
+        await record_delivery(job_data, scheduled, str(error))
+        logger.error(f"Giving up on post {job_name} after {attempt - 1} retries: {error}")
+        if once and job_name:
+            await remove_post(job_name)
+        return
+
+    delay = retry_delay(error, attempt)
+    logger.warning(f"Telegram error sending post {job_name} ({category}), retry {attempt} in {delay:g}s: {error}")
+    context.job_queue.run_once(
+        send_scheduled_post_retry,
+        when=delay,
+        data={**job_data, 'attempt': attempt, 'once': once, 'scheduled': scheduled},
+        name=f"{job_name}:retry",
+    )
+
+
+async def deliver_post(context: ContextTypes.DEFAULT_TYPE, once: bool) -> None:
+    """Send the post of the current job; one-time posts are removed once sent."""
     job_data = context.job.data
+    scheduled = scheduled_run_time(context)
     try:
+        text = post_texts.get(job_data['text_id'])
         await context.bot.send_message(
             chat_id=job_data['chat_id'],
-            text=job_data['text']
+            text=text
         )
-        logger.info(f"Scheduled post sent: {job_data['text'][:50]}...")
     except TelegramError as e:
-        logger.error(f"Telegram error sending post: {e}")
+        await handle_send_error(context, job_data, e, once, scheduled)
+        return
     except Exception as e:
-        logger.error(f"Unexpected error sending post: {e}")
+        logger.error(f"Unexpected error sending post {job_data.get('job_name')}: {e}")
+        await record_delivery(job_data, scheduled, str(e))
+        return
+
+    logger.info(f"{'One-time' if once else 'Scheduled'} post sent: {text[:50]}...")
+    await record_delivery(job_data, scheduled)
+    job_name = job_data.get('job_name')
+    if once and job_name:
+        await remove_post(job_name)
+
+
+async def send_scheduled_post(context: ContextTypes.DEFAULT_TYPE):
+    """Send the scheduled post to the channel (recurring)."""
+    await deliver_post(context, once=False)
 
 
 async def send_scheduled_post_once(context: ContextTypes.DEFAULT_TYPE):
     """Send the scheduled post to the channel (once) and remove from list."""
-    logger.info("DEBUG: send_scheduled_post_once called!")
-    job_data = context.job.data
-    try:
-        await context.bot.send_message(
-            chat_id=job_data['chat_id'],
-            text=job_data['text']
-        )
-        logger.info(f"One-time post sent: {job_data['text'][:50]}...")
-        job_name = job_data.get('job_name')
-        if job_name and job_name in scheduled_posts:
-            del scheduled_posts[job_name]
-    except TelegramError as e:
-        logger.error(f"Telegram error sending one-time post: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error sending one-time post: {e}")
+    await deliver_post(context, once=True)
+
+
+async def send_scheduled_post_retry(context: ContextTypes.DEFAULT_TYPE):
+    """Retry a failed send, unless the post was deleted or paused in the meantime."""
+    post = await storage.get_post(context.job.data.get('job_name'))
+    if post is None or post.get('paused'):
+        return
+    await deliver_post(context, once=context.job.data.get('once', False))
 
 
 async def list_posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -320,10 +891,7 @@ async def list_posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     user_id = update.effective_user.id
 
-    user_posts = [
-        (name, data) for name, data in scheduled_posts.items()
-        if data['user_id'] == user_id
-    ]
+    user_posts = await storage.list_posts(user_id=user_id)
 
     if not user_posts:
         await update.message.reply_text("You have no scheduled posts.")
@@ -331,8 +899,7 @@ async def list_posts(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     message = "Your scheduled posts:\n\n"
     for i, (name, data) in enumerate(user_posts, 1):
-        target = data.get('target', settings.CHANNEL_ID)
-        message += f"{i}. [{data['time']} - {data['type']}] ({target}) {data['text']}\n"
+        message += format_post_line(i, data)
 
     await update.message.reply_text(message)
 
@@ -343,10 +910,7 @@ async def delete_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     user_id = update.effective_user.id
 
-    user_posts = [
-        (name, data) for name, data in scheduled_posts.items()
-        if data['user_id'] == user_id
-    ]
+    user_posts = await storage.list_posts(user_id=user_id)
 
     if not user_posts:
         await update.message.reply_text("You have no scheduled posts to delete.")
@@ -356,8 +920,7 @@ async def delete_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     message = "Which post do you want to delete?\n\n"
     for i, (name, data) in enumerate(user_posts, 1):
-        target = data.get('target', settings.CHANNEL_ID)
-        message += f"{i}. [{data['time']} - {data['type']}] ({target}) {data['text']}\n"
+        message += format_post_line(i, data)
     message += "\nEnter the number to delete (or /cancel):"
 
     await update.message.reply_text(message)
@@ -379,18 +942,18 @@ async def receive_delete(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return WAITING_FOR_DELETE
 
     job_name, data = user_posts[num - 1]
+    preview = post_preview(data) if data['text_id'] in post_texts else ''
 
     jobs = context.job_queue.get_jobs_by_name(job_name)
     for job in jobs:
         job.schedule_removal()
 
-    if job_name in scheduled_posts:
-        del scheduled_posts[job_name]
+    await remove_post(job_name)
 
     logger.info(f"Post deleted by user {update.effective_user.id}: {job_name}")
 
     await update.message.reply_text(
-        f"Deleted post #{num}: [{data['time']}] {data['text']}"
+        f"Deleted post #{num}: [{data['time']}] {preview}"
     )
 
     context.user_data.clear()
@@ -405,10 +968,7 @@ async def edit_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     user_id = update.effective_user.id
 
-    user_posts = [
-        (name, data) for name, data in scheduled_posts.items()
-        if data['user_id'] == user_id
-    ]
+    user_posts = await storage.list_posts(user_id=user_id)
 
     if not user_posts:
         await update.message.reply_text("You have no scheduled posts to edit.")
@@ -418,8 +978,7 @@ async def edit_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     message = "Which post do you want to edit?\n\n"
     for i, (name, data) in enumerate(user_posts, 1):
-        target = data.get('target', settings.CHANNEL_ID)
-        message += f"{i}. [{data['time']} - {data['type']}] ({target}) {data['text']}\n"
+        message += format_post_line(i, data)
     message += "\nEnter the number to edit (or /cancel):"
 
     await update.message.reply_text(message)
@@ -440,13 +999,22 @@ async def receive_edit_select(update: Update, context: ContextTypes.DEFAULT_TYPE
         )
         return WAITING_FOR_EDIT_SELECT
 
-    job_name, data = user_posts[num - 1]
+    job_name, _ = user_posts[num - 1]
+    # Re-read it: a one-time post may have been sent (and removed) since the list was shown
+    data = await storage.get_post(job_name)
+    if data is None:
+        await update.message.reply_text(
+            f"Post #{num} no longer exists.", reply_markup=ReplyKeyboardRemove()
+        )
+        context.user_data.clear()
+        return ConversationHandler.END
+
     context.user_data['edit_job_name'] = job_name
     context.user_data['edit_data'] = data
 
     keyboard = [["Text", "Time"]]
     await update.message.reply_text(
-        f"Editing post #{num}: [{data['time']}] {data['text']}\n\n"
+        f"Editing post #{num}: [{data['time']}] {post_preview(data)}\n\n"
         "What do you want to change?",
         reply_markup=ReplyKeyboardMarkup(keyboard, one_time_keyboard=True)
     )
@@ -459,7 +1027,7 @@ async def receive_edit_choice(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     if choice == 'text':
         data = context.user_data.get('edit_data', {})
-        full_text = data.get('full_text', data.get('text', ''))
+        full_text = post_texts.get(data['text_id']) if data.get('text_id') in post_texts else ''
         await update.message.reply_text(
             f"Current text:\n{full_text}\n\nEnter the new text:",
             reply_markup=ReplyKeyboardRemove()
@@ -498,17 +1066,27 @@ async def receive_edit_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return WAITING_FOR_EDIT_TEXT
 
     job_name = context.user_data.get('edit_job_name')
-    data = context.user_data.get('edit_data', {})
+
+    post = await storage.get_post(job_name)
+    if post is None:
+        await update.message.reply_text("Error: Could not find the scheduled post.")
+        context.user_data.clear()
+        return ConversationHandler.END
+
+    # Copy-on-write: other posts with the same text keep the old one. The new text is
+    # referenced before the awaits, so whichever id a concurrent removal releases is held.
+    new_text_id = post_texts.add(new_text)
+    if not await storage.update_post(job_name, new_text, text_id=new_text_id):
+        post_texts.release(new_text_id)
+        await update.message.reply_text("This post no longer exists.")
+        context.user_data.clear()
+        return ConversationHandler.END
+    post_texts.release(post['text_id'])
 
     # Update job data
     jobs = context.job_queue.get_jobs_by_name(job_name)
     for job in jobs:
-        job.data['text'] = new_text
-
-    # Update scheduled_posts
-    if job_name in scheduled_posts:
-        scheduled_posts[job_name]['text'] = truncate(new_text, MAX_PREVIEW_LENGTH)
-        scheduled_posts[job_name]['full_text'] = new_text
+        job.data['text_id'] = new_text_id
 
     logger.info(f"Post edited by user {update.effective_user.id}: {job_name} - text updated")
 
@@ -538,6 +1116,14 @@ async def receive_edit_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
     job_name = context.user_data.get('edit_job_name')
     data = context.user_data.get('edit_data', {})
     user_id = update.effective_user.id
+    tz_name = data.get('tz', settings.TIMEZONE)
+    frequency = data.get('frequency', 'once')
+
+    # The post leaves its current buckets, so they don't count against the new time
+    moving = data.get('minutes', [])
+    if not minutes_available(fire_minutes(time_str, tz_name, frequency), moving=moving):
+        await update.message.reply_text(time_booked_message(time_str, tz_name, frequency, moving=moving))
+        return WAITING_FOR_EDIT_TIME
 
     # Remove old job
     jobs = context.job_queue.get_jobs_by_name(job_name)
@@ -553,31 +1139,21 @@ async def receive_edit_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Create new job with updated time
     post_time = datetime.strptime(time_str, "%H:%M").time()
-    post_type = data.get('type', 'Once')
-
-    if post_type == 'Daily':
-        context.job_queue.run_daily(
-            send_scheduled_post,
-            time=post_time,
-            data=old_job_data,
-            name=job_name,
-        )
-    else:
-        now = datetime.now(TZ)
-        target = now.replace(hour=post_time.hour, minute=post_time.minute, second=0, microsecond=0)
-        if target <= now:
-            target += timedelta(days=1)
-
-        context.job_queue.run_once(
-            send_scheduled_post_once,
-            when=target,
-            data=old_job_data,
-            name=job_name,
-        )
+    schedule_post_job(
+        context.job_queue,
+        frequency,
+        post_time,
+        old_job_data,
+        job_name,
+        tz=get_zone(tz_name),
+        day=data.get('day'),
+    )
+    if data.get('paused'):
+        for job in context.job_queue.get_jobs_by_name(job_name):
+            if not job.removed:
+                job.enabled = False
 
-    # Update scheduled_posts
-    if job_name in scheduled_posts:
-        scheduled_posts[job_name]['time'] = time_str
+    await set_post_time(job_name, time_str)
 
     logger.info(f"Post edited by user {user_id}: {job_name} - time updated to {time_str}")
 
@@ -597,6 +1173,12 @@ async def batch_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await check_daily_welcome(update, context)
 
     chat_id, chat_name = get_target_chat(update)
+
+    quota_error = check_quota(update.effective_user.id, chat_id)
+    if quota_error:
+        await update.message.reply_text(quota_error)
+        return ConversationHandler.END
+
     context.user_data['target_chat_id'] = chat_id
     context.user_data['target_chat_name'] = chat_name
 
@@ -627,6 +1209,19 @@ async def receive_batch_text(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return WAITING_FOR_BATCH_TEXT
 
+    if settings.MAX_BATCH_SIZE and len(posts) > settings.MAX_BATCH_SIZE:
+        await update.message.reply_text(
+            f"Too many posts ({len(posts)}). A batch can have at most {settings.MAX_BATCH_SIZE}. "
+            "Please re-enter the posts:"
+        )
+        return WAITING_FOR_BATCH_TEXT
+
+    target_chat_id = context.user_data.get('target_chat_id', settings.CHANNEL_ID)
+    quota_error = check_quota(update.effective_user.id, target_chat_id, len(posts))
+    if quota_error:
+        await update.message.reply_text(f"{quota_error}\nPlease enter fewer posts or /cancel:")
+        return WAITING_FOR_BATCH_TEXT
+
     # Validate each post
     for i, post in enumerate(posts, 1):
         if len(post) > MAX_POST_LENGTH:
@@ -660,25 +1255,29 @@ async def receive_batch_time(update: Update, context: ContextTypes.DEFAULT_TYPE)
         )
         return WAITING_FOR_BATCH_TIME
 
+    tz_name = get_timezone_name(update)
+    count = len(context.user_data.get('batch_posts', []))
+    if not minutes_available(fire_minutes(time_str, tz_name, 'once'), count):
+        await update.message.reply_text(time_booked_message(time_str, tz_name, 'once', count))
+        return WAITING_FOR_BATCH_TIME
+
     context.user_data['batch_time'] = time_str
 
-    keyboard = [["Once", "Daily"]]
     await update.message.reply_text(
         "How often should these posts be sent?",
-        reply_markup=ReplyKeyboardMarkup(keyboard, one_time_keyboard=True)
+        reply_markup=ReplyKeyboardMarkup(FREQUENCY_KEYBOARD, one_time_keyboard=True)
     )
     return WAITING_FOR_BATCH_FREQUENCY
 
 
 async def receive_batch_frequency(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Receive frequency and schedule all batch posts."""
-    frequency = update.message.text.strip().lower()
+    frequency = parse_frequency(update.message.text)
 
-    if frequency not in ['once', 'daily']:
-        keyboard = [["Once", "Daily"]]
+    if frequency is None:
         await update.message.reply_text(
-            "Please choose 'Once' or 'Daily'",
-            reply_markup=ReplyKeyboardMarkup(keyboard, one_time_keyboard=True)
+            FREQUENCY_PROMPT,
+            reply_markup=ReplyKeyboardMarkup(FREQUENCY_KEYBOARD, one_time_keyboard=True)
         )
         return WAITING_FOR_BATCH_FREQUENCY
 
@@ -687,52 +1286,42 @@ async def receive_batch_frequency(update: Update, context: ContextTypes.DEFAULT_
     target_chat_id = context.user_data.get('target_chat_id', settings.CHANNEL_ID)
     target_chat_name = context.user_data.get('target_chat_name', str(settings.CHANNEL_ID))
     user_id = update.effective_user.id
+    tz_name = get_timezone_name(update)
 
-    post_time = datetime.strptime(time_str, "%H:%M").time()
-    freq_display = "Daily" if frequency == 'daily' else "Once"
+    # Counters may have changed while the user was typing
+    quota_error = check_quota(user_id, target_chat_id, len(posts))
+    if quota_error:
+        await update.message.reply_text(quota_error, reply_markup=ReplyKeyboardRemove())
+        context.user_data.clear()
+        return ConversationHandler.END
+    if not minutes_available(fire_minutes(time_str, tz_name, frequency), len(posts)):
+        await update.message.reply_text(
+            time_booked_message(time_str, tz_name, frequency, len(posts)),
+            reply_markup=ReplyKeyboardRemove()
+        )
+        return WAITING_FOR_BATCH_TIME
+
+    day = None
+    freq_display = ""
     scheduled_count = 0
 
     for i, post_text in enumerate(posts):
         job_name = f"post_{user_id}_{datetime.now().timestamp()}_{i}"
-        job_data = {'text': post_text, 'chat_id': target_chat_id, 'job_name': job_name}
-
-        if frequency == 'daily':
-            context.job_queue.run_daily(
-                send_scheduled_post,
-                time=post_time,
-                data=job_data,
-                name=job_name,
-            )
-        else:
-            now = datetime.now(TZ)
-            target = now.replace(hour=post_time.hour, minute=post_time.minute, second=0, microsecond=0)
-            if target <= now:
-                target += timedelta(days=1)
-
-            context.job_queue.run_once(
-                send_scheduled_post_once,
-                when=target,
-                data=job_data,
-                name=job_name,
-            )
-
-        scheduled_posts[job_name] = {
-            'text': truncate(post_text, MAX_PREVIEW_LENGTH),
-            'full_text': post_text,
-            'time': time_str,
-            'user_id': user_id,
-            'type': freq_display,
-            'target': target_chat_name,
-            'chat_id': target_chat_id,
-        }
+        # Anchor every post of the batch to the same weekday / day of month
+        post = await create_post(
+            context.job_queue, job_name, post_text, time_str, frequency, tz_name,
+            user_id, target_chat_id, target_chat_name, day=day,
+        )
+        day = post['day']
+        freq_display = post['type']
         scheduled_count += 1
 
-    logger.info(f"Batch scheduled by user {user_id}: {scheduled_count} posts at {time_str} ({freq_display})")
+    logger.info(f"Batch scheduled by user {user_id}: {scheduled_count} posts at {time_str} {tz_name} ({freq_display})")
 
     await update.message.reply_text(
         f"Batch scheduled!\n\n"
         f"Posts: {scheduled_count}\n"
-        f"Time: {time_str} ({freq_display})\n"
+        f"Time: {time_str} {tz_name} ({freq_display})\n"
         f"Target: {target_chat_name}",
         reply_markup=ReplyKeyboardRemove()
     )
@@ -741,36 +1330,79 @@ async def receive_batch_frequency(update: Update, context: ContextTypes.DEFAULT_
     return ConversationHandler.END
 
 
+# ============ TIMEZONE ============
+
+async def timezone_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show or set the timezone (per user in private chats, per group in groups)."""
+    await check_daily_welcome(update, context)
+
+    chat = update.effective_chat
+    scope = "this group" if chat.type in ("group", "supergroup") else "you"
+
+    if not context.args:
+        await update.message.reply_text(
+            f"Current timezone for {scope}: {get_timezone_name(update)}\n\n"
+            "To change it: /timezone Area/City (e.g., /timezone Europe/Berlin)"
+        )
+        return
+
+    name = context.args[0]
+    try:
+        get_zone(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        await update.message.reply_text(
+            f"Unknown timezone: {name}\n"
+            "Use an IANA name such as Europe/Kyiv, America/New_York or UTC."
+        )
+        return
+
+    chat_timezones[chat.id] = name
+    await workers.run_io(save_timezones, *snapshot_timezones())
+
+    logger.info(f"Timezone for chat {chat.id} set to {name} by user {update.effective_user.id}")
+
+    await update.message.reply_text(
+        f"Timezone for {scope} set to {name}.\n"
+        "New posts will be scheduled in this timezone; existing posts keep theirs."
+    )
+
+
 # ============ ADMIN DASHBOARD ============
 
-async def admin_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Show admin dashboard with stats."""
+async def check_admin(update: Update) -> bool:
+    """Check that the user is the admin, replying with an error if not."""
     user_id = update.effective_user.id
-
-    # Check if user is admin
     if settings.ADMIN_ID and str(user_id) != str(settings.ADMIN_ID):
         await update.message.reply_text("You are not authorized to use this command.")
+        return False
+    return True
+
+
+async def admin_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show admin dashboard with stats."""
+    if not await check_admin(update):
         return
 
-    total_posts = len(scheduled_posts)
-    daily_posts = sum(1 for d in scheduled_posts.values() if d['type'] == 'Daily')
-    once_posts = sum(1 for d in scheduled_posts.values() if d['type'] == 'Once')
+    posts = [data for _, data in await storage.list_posts()]
+    total_posts = len(posts)
+    once_posts = sum(1 for d in posts if d.get('frequency', 'once') == 'once')
+    recurring_posts = total_posts - once_posts
 
     # Count posts by user
     user_counts: dict[int, int] = {}
-    for data in scheduled_posts.values():
+    for data in posts:
         uid = data['user_id']
         user_counts[uid] = user_counts.get(uid, 0) + 1
 
     # Count posts by target
     target_counts: dict[str, int] = {}
-    for data in scheduled_posts.values():
+    for data in posts:
         target = data.get('target', 'Unknown')
         target_counts[target] = target_counts.get(target, 0) + 1
 
     message = "📊 Admin Dashboard\n\n"
     message += f"Total scheduled posts: {total_posts}\n"
-    message += f"├ Daily: {daily_posts}\n"
+    message += f"├ Recurring: {recurring_posts}\n"
     message += f"└ One-time: {once_posts}\n\n"
 
     if user_counts:
@@ -785,11 +1417,277 @@ async def admin_dashboard(update: Update, context: ContextTypes.DEFAULT_TYPE):
             message += f"├ {target}: {count} post(s)\n"
         message += "\n"
 
-    message += f"Active users today: {len(user_last_interaction)}"
+    day_stats = deliveries.summary(hours=24)
+    message += "Deliveries (last 24h):\n"
+    if day_stats.total:
+        p95 = day_stats.lateness_percentile(0.95)
+        p95_display = "n/a" if p95 is None else ("> 1h" if p95 == float('inf') else f"≤ {p95:g}s")
+        message += f"├ Sent: {day_stats.sent} / {day_stats.total} ({1 - day_stats.failure_rate:.1%})\n"
+        message += f"├ Failed: {day_stats.failed}\n"
+        message += f"└ p95 lateness: {p95_display}\n\n"
+    else:
+        message += "└ None\n\n"
+
+    failing_chats = [
+        (chat_id, rollup) for chat_id, rollup in deliveries.chat_summaries(days=7).items() if rollup.failed
+    ]
+    if failing_chats:
+        message += "Failure rate by chat (last 7 days):\n"
+        for chat_id, rollup in sorted(failing_chats, key=lambda x: -x[1].failure_rate)[:10]:
+            message += f"├ {chat_id}: {rollup.failure_rate:.0%} of {rollup.total}\n"
+        message += "\n"
+
+    message += f"Unique texts stored: {len(post_texts)}\n"
+    message += f"Active users today: {await storage.count_seen(datetime.now(get_zone(settings.TIMEZONE)).date())}"
 
     await update.message.reply_text(message)
 
 
+# ============ ADMIN BULK OPERATIONS ============
+
+BULK_USAGE = (
+    "Usage: /bulk delete|pause|resume [user=ID] [chat=ID] [from=HH:MM] [to=HH:MM]\n"
+    "At least one filter is required; use 'all' to match every post.\n"
+    "Example: /bulk pause chat=-100123 from=08:00 to=12:00"
+)
+
+
+def post_record(job_name: str, post: dict[str, Any]) -> dict[str, Any]:
+    """Self-contained record of a post for export."""
+    return {
+        'job_name': job_name,
+        'text': post_texts.get(post['text_id']),
+        'time': post['time'],
+        'frequency': post['frequency'],
+        'day': post['day'],
+        'tz': post['tz'],
+        'user_id': post['user_id'],
+        'chat_id': post['chat_id'],
+        'target': post['target'],
+        'paused': post.get('paused', False),
+    }
+
+
+def export_posts(records: list[dict[str, Any]]) -> bytes:
+    """Serialize post records as JSON Lines, one post per line."""
+    buffer = io.StringIO()
+    for record in records:
+        buffer.write(json.dumps(record, ensure_ascii=False))
+        buffer.write('\n')
+    return buffer.getvalue().encode('utf-8')
+
+
+def parse_bulk_filters(args: list[str]) -> dict[str, str] | None:
+    """Parse key=value filters of /bulk. Returns None if they are invalid."""
+    if args == ['all']:
+        return {}
+    filters_: dict[str, str] = {}
+    for arg in args:
+        key, sep, value = arg.partition('=')
+        if not sep or key not in ('user', 'chat', 'from', 'to') or not value:
+            return None
+        if key in ('from', 'to'):
+            try:
+                value = datetime.strptime(value, "%H:%M").strftime("%H:%M")
+            except ValueError:
+                return None
+        filters_[key] = value
+    return filters_ or None
+
+
+async def match_posts(filters_: dict[str, str]) -> list[tuple[str, dict[str, Any]]]:
+    """Posts matching /bulk filters. Time windows use each post's own time."""
+    matched = []
+    for job_name, post in await storage.list_posts(chat_id=filters_.get('chat')):
+        if 'user' in filters_ and str(post['user_id']) != filters_['user']:
+            continue
+        if 'from' in filters_ and post['time'] < filters_['from']:
+            continue
+        if 'to' in filters_ and post['time'] > filters_['to']:
+            continue
+        matched.append((job_name, post))
+    return matched
+
+
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Send all scheduled posts as a JSONL document (admin only)."""
+    if not await check_admin(update):
+        return
+
+    # Snapshot on the event loop; serializing happens off it
+    records = [post_record(job_name, post) for job_name, post in await storage.list_posts()]
+    content = await workers.run_io(export_posts, records)
+    filename = f"posts-{datetime.now(get_zone(settings.TIMEZONE)).strftime('%Y%m%d-%H%M')}.jsonl"
+
+    await update.message.reply_document(
+        document=content,
+        filename=filename,
+        caption=f"{len(records)} post(s) exported."
+    )
+    logger.info(f"Admin {update.effective_user.id} exported {len(records)} posts")
+
+
+async def import_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Start importing posts from a JSONL document (admin only)."""
+    if not await check_admin(update):
+        return ConversationHandler.END
+
+    await update.message.reply_text(
+        "Send the JSONL file to import (as produced by /export), or /cancel.\n"
+        "Each line needs: text, time, frequency, tz, user_id, chat_id."
+    )
+    return WAITING_FOR_IMPORT_FILE
+
+
+async def receive_import_file(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Import posts from the uploaded JSONL document."""
+    telegram_file = await update.message.document.get_file()
+    content = await telegram_file.download_as_bytearray()
+
+    imported = 0
+    errors: list[str] = []
+    for line_num, line in enumerate(content.decode('utf-8', errors='replace').splitlines(), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            text = str(record['text'])
+            if not isinstance(record['time'], str):
+                raise ValueError(f"time must be a string like '09:30', got {record['time']!r}")
+            time_str = datetime.strptime(record['time'], "%H:%M").strftime("%H:%M")
+            frequency = parse_frequency(record['frequency'].replace('_', ' '))
+            if frequency is None:
+                raise ValueError(f"unknown frequency {record['frequency']!r}")
+            tz_name = record.get('tz') or settings.TIMEZONE
+            if not isinstance(tz_name, str):
+                raise ValueError(f"tz must be a timezone name, got {tz_name!r}")
+            get_zone(tz_name)
+            user_id = int(record['user_id'])
+            chat_id = record['chat_id']
+            if isinstance(chat_id, bool) or not isinstance(chat_id, (int, str)) or chat_id == '':
+                raise ValueError(f"chat_id must be a number or a non-empty string, got {chat_id!r}")
+            target = record.get('target') or str(chat_id)
+            if not isinstance(target, str):
+                raise ValueError(f"target must be a string, got {target!r}")
+            day = parse_day(frequency, record.get('day'))
+            if not text or len(text) > MAX_POST_LENGTH:
+                raise ValueError("text is empty or too long")
+
+            job_name = record.get('job_name')
+            if job_name is not None and not isinstance(job_name, str):
+                raise ValueError(f"job_name must be a string, got {job_name!r}")
+            if not job_name or await storage.get_post(job_name) is not None:
+                job_name = f"post_{user_id}_{datetime.now().timestamp()}_{line_num}"
+
+            post = await create_post(
+                context.job_queue, job_name, text, time_str, frequency, tz_name,
+                user_id, chat_id, target,
+                day=day,
+            )
+        except (KeyError, TypeError, ValueError, AttributeError, ZoneInfoNotFoundError) as e:
+            errors.append(f"line {line_num}: {e}")
+            continue
+
+        if record.get('paused'):
+            await set_posts_paused([(job_name, post)], context.job_queue, True)
+        imported += 1
+
+    logger.info(f"Admin {update.effective_user.id} imported {imported} posts ({len(errors)} errors)")
+
+    message = f"Imported {imported} post(s)."
+    if errors:
+        message += f"\n\nSkipped {len(errors)} line(s):\n" + "\n".join(errors[:10])
+    await update.message.reply_text(message)
+    return ConversationHandler.END
+
+
+def jobs_by_name(job_queue: JobQueue) -> dict[str, list]:
+    """All jobs grouped by name, collected in a single pass over the scheduler."""
+    jobs: dict[str, list] = {}
+    for job in job_queue.jobs():
+        jobs.setdefault(job.name, []).append(job)
+    return jobs
+
+
+@contextmanager
+def quiet_scheduler():
+    """Silence the scheduler's per-job INFO lines ("Added job", "Removed job") in a bulk operation.
+
+    Only for code without awaits, so other handlers' scheduler logs aren't hidden meanwhile.
+    """
+    scheduler_logger = logging.getLogger('apscheduler.scheduler')
+    level = scheduler_logger.level
+    scheduler_logger.setLevel(logging.WARNING)
+    try:
+        yield
+    finally:
+        scheduler_logger.setLevel(level)
+
+
+async def delete_posts(job_names: list[str], job_queue: JobQueue) -> int:
+    """Delete posts and their jobs. Returns the number of posts deleted.
+
+    The scheduler has no batch removal, so each job is still removed on its own (a bisect and
+    a list delete in the memory job store), but in one pass and without a log line per job.
+    """
+    jobs = jobs_by_name(job_queue)
+    with quiet_scheduler():
+        for job_name in job_names:
+            for job in jobs.get(job_name, ()):
+                job.schedule_removal()
+    return len(await remove_posts(job_names))
+
+
+async def set_posts_paused(posts: list[tuple[str, dict[str, Any]]], job_queue: JobQueue, paused: bool) -> int:
+    """Pause or resume posts. Returns the number of posts changed.
+
+    A one-time post resumed after its time has passed is removed together with its job, rather
+    than left to the scheduler (which would send it late or drop it, depending on how late).
+    """
+    jobs = jobs_by_name(job_queue)
+    now = datetime.now(timezone.utc)
+    changed: list[str] = []
+    expired: list[str] = []
+    with quiet_scheduler():
+        for job_name, post in posts:
+            if post.get('paused', False) == paused:
+                continue
+            for job in jobs.get(job_name, ()):
+                job.enabled = not paused
+                # Resuming a one-time job restores its original run date, even if that has passed
+                if not paused and job.next_t is not None and job.next_t <= now:
+                    job.schedule_removal()
+                    expired.append(job_name)
+            changed.append(job_name)
+    count = await storage.update_posts(changed, paused=paused)
+    if expired:
+        await remove_posts(expired)
+    return count
+
+
+async def bulk_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Delete, pause or resume all posts matching filters (admin only)."""
+    if not await check_admin(update):
+        return
+
+    args = context.args or []
+    action = args[0].lower() if args else ''
+    filters_ = parse_bulk_filters(args[1:]) if action in ('delete', 'pause', 'resume') else None
+    if filters_ is None:
+        await update.message.reply_text(BULK_USAGE)
+        return
+
+    posts = await match_posts(filters_)
+    if action == 'delete':
+        count = await delete_posts([job_name for job_name, _ in posts], context.job_queue)
+    else:
+        count = await set_posts_paused(posts, context.job_queue, action == 'pause')
+
+    past = {'delete': 'Deleted', 'pause': 'Paused', 'resume': 'Resumed'}[action]
+    logger.info(f"Admin {update.effective_user.id} bulk {action} {filters_ or 'all'}: {count} posts")
+    await update.message.reply_text(f"{past} {count} of {len(posts)} matching post(s).")
+
+
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Cancel the current operation."""
     context.user_data.clear()
@@ -800,11 +1698,182 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ConversationHandler.END
 
 
+async def restore_posts(job_queue: JobQueue) -> int:
+    """Reschedule the posts kept in storage from a previous run. Returns the number restored.
+
+    One-time posts whose time passed while the bot was down are sent at the next occurrence
+    of their time.
+    """
+    paused = []
+    missing = []
+    texts = await storage.get_texts()
+    stored = await storage.list_posts()
+    with quiet_scheduler():
+        for job_name, post in stored:
+            if post['text_id'] not in texts:
+                logger.error(f"Dropping stored post {job_name}: its text {post['text_id']} is missing")
+                missing.append(job_name)
+                continue
+            # Texts are content-addressed, so the id is the same as before the restart
+            text_id = post_texts.add(texts[post['text_id']])
+            _count_post(post, 1)
+            job_data = {'text_id': text_id, 'chat_id': post['chat_id'], 'job_name': job_name}
+            post_time = datetime.strptime(post['time'], "%H:%M").time()
+            schedule_post_job(
+                job_queue, post['frequency'], post_time, job_data, job_name,
+                tz=get_zone(post['tz']), day=post['day'],
+            )
+            if post.get('paused'):
+                paused.append(job_name)
+
+        jobs = jobs_by_name(job_queue)
+        for job_name in paused:
+            for job in jobs.get(job_name, ()):
+                job.enabled = False
+    if missing:
+        await storage.delete_posts(missing)
+    return len(stored) - len(missing)
+
+
+async def post_init(application: Application) -> None:
+    """Open the storage, restore posts and start event loop monitoring once the loop is running."""
+    if settings.LOOP_DEBUG:
+        workers.enable_slow_callback_logging(settings.LOOP_LAG_THRESHOLD)
+    workers.start_loop_lag_monitor(settings.LOOP_LAG_INTERVAL, settings.LOOP_LAG_THRESHOLD)
+
+    await storage.open()
+    startup.mark('storage')
+
+    logger.info(f"Loaded {deliveries.load(await storage.list_deliveries(deliveries.since()))} delivery record(s)")
+    startup.mark('delivery rollups')
+    application.job_queue.scheduler.add_listener(remember_run_time, EVENT_JOB_SUBMITTED)
+    application.job_queue.run_repeating(prune_deliveries, interval=timedelta(days=1), first=0,
+                                        name='prune_deliveries')
+
+    logger.info(f"Restored {await restore_posts(application.job_queue)} scheduled post(s)")
+    startup.mark('posts')
+
+    startup.report()
+
+
+async def post_shutdown(application: Application) -> None:
+    """Close the storage, stop loop monitoring and flush pending background I/O."""
+    await storage.close()
+    workers.shutdown()
+
+
+class SerializedApplication(Application):
+    """Application that processes updates concurrently, but one at a time per user in a chat.
+
+    Conversation state is keyed by (chat, user), so updates sharing that key must not overlap:
+    the next message has to see the state left by the previous one. Updates from different
+    users, or the same user in different chats, still run in parallel.
+
+    PTB takes a `concurrent_updates` slot before calling process_update(), so updates queued
+    behind the same key would each hold a slot while waiting, and one user sending a burst
+    could stall everyone else. Here PTB's limit is lifted and the slot is taken only once the
+    update's turn for its key has come.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._update_slots = asyncio.BoundedSemaphore(self.concurrent_updates or 1)
+        self._concurrent_updates_sem = asyncio.BoundedSemaphore(sys.maxsize)
+        # key -> [lock, number of updates holding or waiting for it]
+        self._update_locks: dict[tuple[int, int], list] = {}
+
+    async def process_update(self, update: object) -> None:
+        if not isinstance(update, Update) or not update.effective_chat or not update.effective_user:
+            async with self._update_slots:
+                await super().process_update(update)
+            return
+
+        key = (update.effective_chat.id, update.effective_user.id)
+        entry = self._update_locks.get(key)
+        if entry is None:
+            entry = self._update_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0], self._update_slots:
+                await super().process_update(update)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._update_locks[key]
+
+
+class KeepAliveHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest with a configurable expiry for idle keep-alive connections."""
+
+    __slots__ = ("_keepalive_expiry",)
+
+    def __init__(self, *args, keepalive_expiry: float | None = 5.0, **kwargs):
+        self._keepalive_expiry = keepalive_expiry
+        super().__init__(*args, **kwargs)
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = self._client_kwargs['limits']
+        self._client_kwargs['limits'] = httpx.Limits(
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=self._keepalive_expiry,
+        )
+        return super()._build_client()
+
+
+def build_request(get_updates: bool = False) -> HTTPXRequest:
+    """Build the HTTP client for API calls, or for getUpdates long polling.
+
+    The two use separate connection pools, so a burst of scheduled sends never waits
+    behind the long-polling connection or the other way round.
+    """
+    if get_updates:
+        return KeepAliveHTTPXRequest(
+            connection_pool_size=settings.GET_UPDATES_CONNECTION_POOL_SIZE,
+            pool_timeout=settings.GET_UPDATES_POOL_TIMEOUT,
+            connect_timeout=settings.CONNECT_TIMEOUT,
+            read_timeout=settings.GET_UPDATES_READ_TIMEOUT,
+            write_timeout=settings.WRITE_TIMEOUT,
+            http_version=settings.GET_UPDATES_HTTP_VERSION,
+            keepalive_expiry=settings.KEEPALIVE_EXPIRY,
+        )
+    return KeepAliveHTTPXRequest(
+        connection_pool_size=settings.CONNECTION_POOL_SIZE,
+        pool_timeout=settings.POOL_TIMEOUT,
+        connect_timeout=settings.CONNECT_TIMEOUT,
+        read_timeout=settings.READ_TIMEOUT,
+        write_timeout=settings.WRITE_TIMEOUT,
+        http_version=settings.HTTP_VERSION,
+        keepalive_expiry=settings.KEEPALIVE_EXPIRY,
+    )
+
+
 def main():
     """Run the bot."""
-    # Use Kyiv timezone for scheduling
-    defaults = Defaults(tzinfo=ZoneInfo("Europe/Kyiv"))
-    application = Application.builder().token(settings.BOT_TOKEN).defaults(defaults).build()
+    global storage
+    settings.validate_config()
+    setup_logging()
+    storage = create_storage(settings.STORAGE_BACKEND, settings.DATABASE_FILE)
+    startup.mark('config')
+
+    load_timezones()
+    startup.mark('timezones')
+
+    # Use the default timezone for scheduling
+    defaults = Defaults(tzinfo=get_zone(settings.TIMEZONE))
+    application = (
+        Application.builder()
+        .application_class(SerializedApplication)
+        .token(settings.BOT_TOKEN)
+        .request(build_request())
+        .get_updates_request(build_request(get_updates=True))
+        .defaults(defaults)
+        .concurrent_updates(settings.CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
+    startup.mark('application')
 
     schedule_handler = ConversationHandler(
         entry_points=[CommandHandler('schedule', schedule_start)],
@@ -867,16 +1936,32 @@ def main():
         fallbacks=[CommandHandler('cancel', cancel)],
     )
 
+    import_handler = ConversationHandler(
+        entry_points=[CommandHandler('import', import_start)],
+        states={
+            WAITING_FOR_IMPORT_FILE: [
+                MessageHandler(filters.Document.ALL, receive_import_file)
+            ],
+        },
+        fallbacks=[CommandHandler('cancel', cancel)],
+    )
+
     application.add_handler(CommandHandler('start', start))
     application.add_handler(CommandHandler('list', list_posts))
     application.add_handler(CommandHandler('admin', admin_dashboard))
+    application.add_handler(CommandHandler('timezone', timezone_command))
+    application.add_handler(CommandHandler('export', export_command))
+    application.add_handler(CommandHandler('bulk', bulk_command))
     application.add_handler(schedule_handler)
     application.add_handler(delete_handler)
     application.add_handler(edit_handler)
     application.add_handler(batch_handler)
+    application.add_handler(import_handler)
+    startup.mark('handlers')
 
     logger.info("Bot started!")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    # An explicit read timeout here overrides the one of the getUpdates request object
+    application.run_polling(allowed_updates=Update.ALL_TYPES, read_timeout=settings.GET_UPDATES_READ_TIMEOUT)
 
 
 if __name__ == '__main__':
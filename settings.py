@@ -1,5 +1,6 @@
 import os
 import sys
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from dotenv import load_dotenv
 
@@ -9,6 +10,46 @@ BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 CHANNEL_ID = os.getenv("CHANNEL_ID", "")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 ADMIN_ID = os.getenv("ADMIN_ID", "")
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "").lower() in ("1", "true", "yes")
+TIMEZONE = os.getenv("TIMEZONE", "Europe/Kyiv")
+TIMEZONES_FILE = os.getenv("TIMEZONES_FILE", "timezones.json")
+
+# Storage of posts, user activity and delivery records: "sqlite" (kept across restarts) or "memory"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite").lower()
+DATABASE_FILE = os.getenv("DATABASE_FILE", "bot.db")
+
+# Quotas (0 = unlimited)
+MAX_POSTS_PER_USER = int(os.getenv("MAX_POSTS_PER_USER", "100"))
+MAX_POSTS_PER_CHAT = int(os.getenv("MAX_POSTS_PER_CHAT", "500"))
+MAX_POSTS_PER_MINUTE = int(os.getenv("MAX_POSTS_PER_MINUTE", "200"))
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "20"))
+
+# Retries of failed sends (network errors, flood control)
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "10.0"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "600.0"))
+
+# Telegram HTTP client (sends and other API calls)
+CONNECTION_POOL_SIZE = int(os.getenv("CONNECTION_POOL_SIZE", "256"))
+POOL_TIMEOUT = float(os.getenv("POOL_TIMEOUT", "5.0"))
+CONNECT_TIMEOUT = float(os.getenv("CONNECT_TIMEOUT", "5.0"))
+READ_TIMEOUT = float(os.getenv("READ_TIMEOUT", "10.0"))
+WRITE_TIMEOUT = float(os.getenv("WRITE_TIMEOUT", "10.0"))
+KEEPALIVE_EXPIRY = float(os.getenv("KEEPALIVE_EXPIRY", "30.0"))
+HTTP_VERSION = os.getenv("HTTP_VERSION", "1.1")
+
+# Telegram HTTP client (getUpdates long polling)
+GET_UPDATES_CONNECTION_POOL_SIZE = int(os.getenv("GET_UPDATES_CONNECTION_POOL_SIZE", "1"))
+GET_UPDATES_POOL_TIMEOUT = float(os.getenv("GET_UPDATES_POOL_TIMEOUT", "1.0"))
+GET_UPDATES_READ_TIMEOUT = float(os.getenv("GET_UPDATES_READ_TIMEOUT", "5.0"))
+GET_UPDATES_HTTP_VERSION = os.getenv("GET_UPDATES_HTTP_VERSION", "1.1")
+
+# Event loop
+CONCURRENT_UPDATES = int(os.getenv("CONCURRENT_UPDATES", "32"))
+IO_WORKERS = int(os.getenv("IO_WORKERS", "4"))
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "1.0"))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1"))
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "").lower() in ("1", "true", "yes")
 
 
 def validate_config() -> None:
@@ -22,3 +63,11 @@ def validate_config() -> None:
         print(f"ERROR: Missing required environment variables: {', '.join(missing)}")
         print("Copy .env.example to .env and fill in the values.")
         sys.exit(1)
+    if STORAGE_BACKEND not in ("sqlite", "memory"):
+        print(f"ERROR: STORAGE_BACKEND must be 'sqlite' or 'memory', got {STORAGE_BACKEND!r}")
+        sys.exit(1)
+    try:
+        ZoneInfo(TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        print(f"ERROR: TIMEZONE must be an IANA timezone name like 'Europe/Kyiv', got {TIMEZONE!r}")
+        sys.exit(1)
@@ -1,15 +1,22 @@
-import subprocess
-import sys
+import startup  # first import: starts the startup clock before the heavy imports below
+
 import threading
 
 from flask import Flask
 
+import main_bot
+
 app = Flask(__name__)
 
 
+def run_web() -> None:
+    """Run the Flask server."""
+    app.run(host="0.0.0.0", port=5000)
+
+
 def run_bot() -> None:
-    """Run the bot in a subprocess."""
-    subprocess.Popen([sys.executable, "main_bot.py"])
+    """Run the bot in this interpreter. Blocks; must be called from the main thread."""
+    main_bot.main()
 
 
 @app.route('/')
@@ -18,6 +25,6 @@ def home():
 
 
 if __name__ == "__main__":
-    bot_thread = threading.Thread(target=run_bot, daemon=True)
-    bot_thread.start()
-    app.run(host="0.0.0.0", port=5000)
+    web_thread = threading.Thread(target=run_web, daemon=True)
+    web_thread.start()
+    run_bot()
@@ -0,0 +1,27 @@
+import logging
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+# The clock starts when this module is first imported, so entry points import it first
+_started = _last = perf_counter()
+_phases: list[tuple[str, float]] = []
+
+
+def mark(phase: str) -> None:
+    """Record the time since the previous mark (or since startup) as `phase`."""
+    global _last
+    now = perf_counter()
+    _phases.append((phase, now - _last))
+    _last = now
+
+
+def report() -> None:
+    """Log the time spent in each startup phase if STARTUP_PROFILE is enabled."""
+    import settings
+
+    if not settings.STARTUP_PROFILE:
+        return
+    lines = [f"  {phase:<20} {seconds * 1000:8.1f} ms" for phase, seconds in _phases]
+    lines.append(f"  {'total':<20} {(_last - _started) * 1000:8.1f} ms")
+    logger.info("Startup profile:\n" + "\n".join(lines))
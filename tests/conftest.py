@@ -0,0 +1,23 @@
+import asyncio
+import inspect
+
+import pytest
+
+import workers
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run `async def` tests in a fresh event loop."""
+    if inspect.iscoroutinefunction(pyfuncitem.obj):
+        args = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+        asyncio.run(pyfuncitem.obj(**args))
+        return True
+    return None
+
+
+@pytest.fixture(scope='session', autouse=True)
+def io_threads():
+    """Stop the I/O thread pool used by SQLiteStorage after the test run."""
+    yield
+    workers.shutdown()
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from apscheduler.events import EVENT_JOB_SUBMITTED
+from telegram.error import BadRequest, NetworkError
+from telegram.ext import Application
+
+import main_bot
+import settings
+from delivery_log import DeliveryLog
+from storage import InMemoryStorage
+
+
+@pytest.fixture
+def delivery_state(monkeypatch):
+    """Fresh storage and rollups in place of the module's."""
+    monkeypatch.setattr(main_bot, 'storage', InMemoryStorage())
+    monkeypatch.setattr(main_bot, 'deliveries', DeliveryLog())
+    return main_bot
+
+
+def job_context(data: dict) -> SimpleNamespace:
+    return SimpleNamespace(job=SimpleNamespace(job=SimpleNamespace(id='job'), data=data), job_queue=MagicMock())
+
+
+# ============ Scheduled run time ============
+
+async def test_scheduled_run_time_of_drifting_interval_post():
+    """Every 5 hours doesn't divide a day, so the series drifts against the wall clock: a post
+    first due at 10:00 fires at 11:00 the next day. The time a run was due comes from the
+    scheduler, not from the post's wall-clock time."""
+    app = Application.builder().token('1:test').build()
+    app.job_queue.scheduler.add_listener(main_bot.remember_run_time, EVENT_JOB_SUBMITTED)
+    due = datetime.now(timezone.utc).replace(microsecond=0) + timedelta(seconds=1)
+    # Anchored 25 hours (five runs) earlier, one hour later on the wall clock than the anchor
+    first = due - timedelta(hours=25)
+    seen = asyncio.get_running_loop().create_future()
+
+    async def callback(context):
+        seen.set_result(main_bot.scheduled_run_time(context))
+
+    app.job_queue.run_repeating(callback, interval=timedelta(hours=5), first=first, data={})
+    await app.job_queue.start()
+    try:
+        assert await asyncio.wait_for(seen, 5) == due.timestamp()
+    finally:
+        await app.job_queue.stop()
+    assert main_bot._run_times == {}
+
+
+def test_retries_keep_the_first_scheduled_time():
+    context = job_context({'scheduled': 100.0, 'attempt': 2})
+
+    assert main_bot.scheduled_run_time(context) == 100.0
+
+
+# ============ Failed sends ============
+
+async def test_retried_failure_is_not_recorded(delivery_state):
+    context = job_context({})
+    job_data = {'job_name': 'post_1', 'chat_id': '@chan', 'text_id': 't'}
+
+    await main_bot.handle_send_error(context, job_data, NetworkError('timed out'), False, 100.0)
+
+    assert await main_bot.storage.list_deliveries(since=0) == []
+    retry = context.job_queue.run_once.call_args.kwargs['data']
+    assert (retry['attempt'], retry['scheduled']) == (1, 100.0)
+
+
+async def test_failure_recorded_once_when_giving_up(delivery_state):
+    job_data = {'job_name': 'post_1', 'chat_id': '@chan', 'text_id': 't', 'attempt': settings.RETRY_MAX_ATTEMPTS}
+
+    await main_bot.handle_send_error(job_context({}), job_data, NetworkError('timed out'), False, 100.0)
+
+    [(scheduled, _, chat_id, job_name, error)] = await main_bot.storage.list_deliveries(since=0)
+    assert (scheduled, chat_id, job_name, error) == (100.0, '@chan', 'post_1', 'timed out')
+
+
+async def test_permanent_failure_recorded(delivery_state):
+    job_data = {'job_name': 'post_1', 'chat_id': '@chan', 'text_id': 't'}
+
+    await main_bot.handle_send_error(job_context({}), job_data, BadRequest('message is too long'), False, 100.0)
+
+    assert len(await main_bot.storage.list_deliveries(since=0)) == 1
+    assert main_bot.deliveries.summary(hours=1).failed == 1
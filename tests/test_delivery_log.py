@@ -0,0 +1,114 @@
+import math
+
+from delivery_log import DAY, HOUR, LATENESS_BINS, DeliveryLog, Rollup
+
+# A fixed "now" half an hour into a bucket, so bucket edges are easy to reason about
+NOW = 1_800_000_000 // DAY * DAY + 12 * HOUR + 30 * 60
+
+
+# ============ Rollup ============
+
+def test_rollup_counts_sent_and_failed():
+    rollup = Rollup()
+    rollup.add(0.5, True)
+    rollup.add(3.0, True)
+    rollup.add(100.0, False)
+
+    assert (rollup.sent, rollup.failed, rollup.total) == (2, 1, 3)
+    assert rollup.failure_rate == 1 / 3
+    assert sum(rollup.histogram) == 2
+
+
+def test_rollup_empty():
+    rollup = Rollup()
+
+    assert rollup.failure_rate == 0.0
+    assert rollup.lateness_percentile(0.95) is None
+
+
+def test_lateness_percentile_returns_bin_upper_bound():
+    rollup = Rollup()
+    for _ in range(90):
+        rollup.add(0.2, True)  # bin <= 1s
+    for _ in range(10):
+        rollup.add(25.0, True)  # bin <= 30s
+
+    assert rollup.lateness_percentile(0.5) == 1
+    assert rollup.lateness_percentile(0.9) == 1
+    assert rollup.lateness_percentile(0.95) == 30
+
+
+def test_lateness_percentile_open_ended_bin():
+    rollup = Rollup()
+    rollup.add(LATENESS_BINS[-1] + 1, True)
+
+    assert math.isinf(rollup.lateness_percentile(0.95))
+
+
+def test_rollup_merge():
+    first, second = Rollup(), Rollup()
+    first.add(0.1, True)
+    second.add(0.1, True)
+    second.add(0.0, False)
+
+    first.merge(second)
+
+    assert (first.sent, first.failed) == (2, 1)
+    assert first.histogram[0] == 2
+
+
+# ============ DeliveryLog ============
+
+def test_summary_covers_the_last_hours():
+    log = DeliveryLog()
+    log.record('@chan', NOW - 10, NOW - 5)
+    log.record('@chan', NOW - 2 * HOUR, NOW - 2 * HOUR, 'timed out')
+    log.record('@chan', NOW - 30 * HOUR, NOW - 30 * HOUR)
+
+    assert log.summary(hours=1, now=NOW).total == 1
+    day = log.summary(hours=24, now=NOW)
+    assert (day.sent, day.failed) == (1, 1)
+
+
+def test_lateness_measured_from_scheduled_time():
+    log = DeliveryLog()
+    log.record('@chan', NOW - 20, NOW)
+    # Sent before its scheduled time (clock skew) counts as on time
+    log.record('@chan', NOW + 5, NOW)
+
+    assert log.summary(hours=1, now=NOW).histogram[LATENESS_BINS.index(30)] == 1
+    assert log.summary(hours=1, now=NOW).histogram[0] == 1
+
+
+def test_chat_summaries_per_chat():
+    log = DeliveryLog()
+    log.record(-100, NOW, NOW)
+    log.record(-100, NOW, NOW, 'bot was kicked')
+    log.record('@chan', NOW - 3 * DAY, NOW - 3 * DAY)
+    log.record('@old', NOW - 10 * DAY, NOW - 10 * DAY)
+
+    chats = log.chat_summaries(days=7, now=NOW)
+
+    assert set(chats) == {'-100', '@chan'}
+    assert chats['-100'].failure_rate == 0.5
+
+
+def test_old_buckets_are_dropped():
+    log = DeliveryLog(hourly_retention=2, daily_retention=2)
+    log.record('@chan', NOW - 5 * DAY, NOW - 5 * DAY)
+    log.record('@chan', NOW, NOW)
+
+    assert log.summary(hours=24 * 10, now=NOW).total == 1
+    assert log.chat_summaries(days=10, now=NOW)['@chan'].total == 1
+
+
+def test_load_rebuilds_rollups():
+    records = [
+        (NOW - 10, NOW - 9, '@chan', 'post_1', None),
+        (NOW - 5, NOW - 4, '-100', 'post_2', 'chat not found'),
+    ]
+    log = DeliveryLog()
+
+    assert log.load(records) == 2
+    summary = log.summary(hours=1, now=NOW)
+    assert (summary.sent, summary.failed) == (1, 1)
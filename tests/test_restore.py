@@ -0,0 +1,53 @@
+import sqlite3
+from collections import Counter
+
+from telegram.ext import Application
+
+import main_bot
+from storage import SQLiteStorage
+from text_store import TextStore
+
+
+def make_post(text_id: str, time: str) -> dict:
+    return {
+        'text_id': text_id,
+        'time': time,
+        'user_id': 1,
+        'type': 'Daily',
+        'frequency': 'daily',
+        'day': None,
+        'tz': 'UTC',
+        'target': '@chan',
+        'chat_id': '@chan',
+        'minutes': [int(time[:2]) * 60],
+    }
+
+
+async def test_restore_drops_posts_whose_text_is_missing(tmp_path, monkeypatch):
+    path = str(tmp_path / 'bot.db')
+    storage = SQLiteStorage(path)
+    await storage.open()
+    await storage.add_post('post_kept', make_post(TextStore.text_id('kept'), '10:00'), 'kept')
+    await storage.add_post('post_lost', make_post('lost', '11:00'), 'lost')
+    await storage.close()
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("DELETE FROM texts WHERE text_id = 'lost'")
+    conn.close()
+
+    storage = SQLiteStorage(path)
+    await storage.open()
+    monkeypatch.setattr(main_bot, 'storage', storage)
+    monkeypatch.setattr(main_bot, 'post_texts', TextStore())
+    for counter in ('user_post_counts', 'chat_post_counts', 'minute_post_counts'):
+        monkeypatch.setattr(main_bot, counter, Counter())
+    app = Application.builder().token('1:test').build()
+    job_queue = app.job_queue
+
+    try:
+        assert await main_bot.restore_posts(job_queue) == 1
+        assert [job.name for job in job_queue.jobs()] == ['post_kept']
+        assert [name for name, _ in await storage.list_posts()] == ['post_kept']
+        assert main_bot.user_post_counts[1] == 1
+    finally:
+        await storage.close()
@@ -0,0 +1,230 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from storage import SQLITE_BATCH_SIZE, SQLiteStorage, create_storage
+
+
+def make_post(user_id: int = 1, chat_id: int | str = '@chan', text_id: str = 'a' * 32, **fields) -> dict:
+    return {
+        'text_id': text_id,
+        'time': '10:00',
+        'user_id': user_id,
+        'type': 'Daily',
+        'frequency': 'daily',
+        'day': None,
+        'tz': 'Europe/Kyiv',
+        'target': str(chat_id),
+        'chat_id': chat_id,
+        'minutes': [420],
+        **fields,
+    }
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def storage(request, tmp_path):
+    storage = create_storage(request.param, str(tmp_path / 'bot.db'))
+    asyncio.run(storage.open())
+    yield storage
+    asyncio.run(storage.close())
+
+
+# ============ Posts ============
+
+async def test_add_and_get_post(storage):
+    post = make_post()
+    await storage.add_post('post_1', post, 'hello')
+
+    assert await storage.get_post('post_1') == post
+    assert await storage.get_post('missing') is None
+    assert await storage.count_posts() == 1
+
+
+async def test_returned_posts_are_copies(storage):
+    await storage.add_post('post_1', make_post(), 'hello')
+
+    (await storage.get_post('post_1'))['time'] = '11:00'
+    (await storage.list_posts())[0][1]['time'] = '12:00'
+
+    assert (await storage.get_post('post_1'))['time'] == '10:00'
+
+
+async def test_add_post_replaces_existing(storage):
+    await storage.add_post('post_1', make_post(user_id=1), 'hello')
+    await storage.add_post('post_1', make_post(user_id=2), 'hello')
+
+    assert await storage.count_posts() == 1
+    assert await storage.list_posts(user_id=1) == []
+    assert [name for name, _ in await storage.list_posts(user_id=2)] == ['post_1']
+
+
+async def test_update_post(storage):
+    await storage.add_post('post_1', make_post(), 'hello')
+
+    assert await storage.update_post('post_1', time='12:00', paused=True)
+    assert not await storage.update_post('missing', time='12:00')
+
+    post = await storage.get_post('post_1')
+    assert post['time'] == '12:00'
+    assert post['paused'] is True
+
+
+async def test_update_posts_counts_existing_only(storage):
+    await storage.add_post('post_1', make_post(), 'hello')
+    await storage.add_post('post_2', make_post(), 'hello')
+
+    assert await storage.update_posts(['post_1', 'missing', 'post_2'], paused=True) == 2
+    assert all(post['paused'] for _, post in await storage.list_posts())
+
+
+async def test_update_posts_moves_between_filters(storage):
+    await storage.add_post('post_1', make_post(user_id=1, chat_id=-100), 'hello')
+
+    await storage.update_posts(['post_1'], user_id=2, chat_id=-200)
+
+    assert await storage.list_posts(user_id=1) == []
+    assert await storage.list_posts(chat_id=-100) == []
+    assert [name for name, _ in await storage.list_posts(user_id=2, chat_id=-200)] == ['post_1']
+
+
+async def test_delete_posts(storage):
+    for i in range(3):
+        await storage.add_post(f"post_{i}", make_post(user_id=i), 'hello')
+
+    deleted = await storage.delete_posts(['post_0', 'missing', 'post_2'])
+
+    assert sorted(name for name, _ in deleted) == ['post_0', 'post_2']
+    assert dict(deleted)['post_2']['user_id'] == 2
+    assert [name for name, _ in await storage.list_posts()] == ['post_1']
+    assert await storage.delete_post('post_0') is None
+    assert (await storage.delete_post('post_1'))['user_id'] == 1
+    assert await storage.count_posts() == 0
+
+
+async def test_batches_larger_than_sqlite_limit(storage):
+    names = [f"post_{i}" for i in range(SQLITE_BATCH_SIZE * 2 + 1)]
+    for name in names:
+        await storage.add_post(name, make_post(), 'hello')
+
+    assert await storage.update_posts(names, paused=True) == len(names)
+    assert len(await storage.delete_posts(names)) == len(names)
+    assert await storage.count_posts() == 0
+
+
+async def test_list_posts_filters_in_creation_order(storage):
+    await storage.add_post('post_b', make_post(user_id=1, chat_id=-100), 'hello')
+    await storage.add_post('post_a', make_post(user_id=2, chat_id=-100), 'hello')
+    await storage.add_post('post_c', make_post(user_id=1, chat_id='@chan'), 'hello')
+
+    async def names(**filters):
+        return [name for name, _ in await storage.list_posts(**filters)]
+
+    assert await names() == ['post_b', 'post_a', 'post_c']
+    assert await names(user_id=1) == ['post_b', 'post_c']
+    assert await names(chat_id=-100) == ['post_b', 'post_a']
+    assert await names(chat_id='-100') == ['post_b', 'post_a']
+    assert await names(user_id=1, chat_id='@chan') == ['post_c']
+    assert await names(user_id=3) == []
+
+
+# ============ Texts ============
+
+async def test_text_stored_with_post(storage):
+    await storage.add_post('post_1', make_post(text_id='t1'), 'hello')
+    await storage.add_post('post_2', make_post(text_id='t1'), 'hello again')
+
+    assert await storage.get_texts() == {'t1': 'hello'}
+
+
+async def test_text_dropped_with_last_post(storage):
+    await storage.add_post('post_1', make_post(text_id='t1'), 'shared')
+    await storage.add_post('post_2', make_post(text_id='t1'), 'shared')
+
+    await storage.delete_post('post_1')
+    assert await storage.get_texts() == {'t1': 'shared'}
+
+    await storage.delete_post('post_2')
+    assert await storage.get_texts() == {}
+
+
+async def test_text_dropped_when_post_moves_to_another(storage):
+    await storage.add_post('post_1', make_post(text_id='t1'), 'old')
+
+    assert await storage.update_post('post_1', 'new', text_id='t2')
+
+    assert await storage.get_texts() == {'t2': 'new'}
+    assert (await storage.get_post('post_1'))['text_id'] == 't2'
+
+
+async def test_new_text_not_kept_when_post_is_gone(storage):
+    assert not await storage.update_post('missing', 'new', text_id='t2')
+
+    assert await storage.get_texts() == {}
+
+
+async def test_text_kept_when_another_post_using_it_is_deleted(storage):
+    """Deleting the last other post with the same text while a new one is added can't orphan it."""
+    await storage.add_post('old', make_post(text_id='t1'), 'shared')
+
+    await asyncio.gather(storage.delete_post('old'), storage.add_post('new', make_post(text_id='t1'), 'shared'))
+
+    assert await storage.get_texts() == {'t1': 'shared'}
+    assert [name for name, _ in await storage.list_posts()] == ['new']
+
+
+# ============ Users ============
+
+async def test_last_seen(storage):
+    assert await storage.get_last_seen(1) is None
+
+    await storage.set_last_seen(1, date(2026, 1, 1))
+    await storage.set_last_seen(1, date(2026, 1, 2))
+    await storage.set_last_seen(2, date(2026, 1, 2))
+    await storage.set_last_seen(3, date(2026, 1, 1))
+
+    assert await storage.get_last_seen(1) == date(2026, 1, 2)
+    assert await storage.count_seen(date(2026, 1, 2)) == 2
+    assert await storage.count_seen(date(2026, 1, 3)) == 0
+
+
+# ============ Deliveries ============
+
+async def test_deliveries(storage):
+    await storage.add_delivery('post_1', -100, 10.0, 11.0)
+    await storage.add_delivery('post_2', '@chan', 20.0, 21.0, 'bot was kicked')
+    await storage.add_delivery('post_1', -100, 30.0, 31.0)
+
+    assert await storage.list_deliveries(since=21.0) == [
+        (20.0, 21.0, '@chan', 'post_2', 'bot was kicked'),
+        (30.0, 31.0, '-100', 'post_1', None),
+    ]
+    assert len(await storage.list_deliveries(since=0)) == 3
+
+
+async def test_prune_deliveries(storage):
+    for sent in range(10):
+        await storage.add_delivery('post_1', '@chan', sent, sent)
+
+    assert await storage.prune_deliveries(before=4) == 4
+    assert [record[1] for record in await storage.list_deliveries(since=0)] == list(range(4, 10))
+
+
+# ============ SQLite ============
+
+async def test_sqlite_keeps_data_across_restart(tmp_path):
+    path = str(tmp_path / 'bot.db')
+    storage = SQLiteStorage(path)
+    await storage.open()
+    await storage.add_post('post_1', make_post(text_id='t1'), 'kept')
+    await storage.set_last_seen(1, date(2026, 1, 1))
+    await storage.add_delivery('post_1', '@chan', 1.0, 2.0)
+    await storage.close()
+
+    storage = SQLiteStorage(path)
+    await storage.open()
+    assert await storage.list_posts() == [('post_1', make_post(text_id='t1'))]
+    assert await storage.get_texts() == {'t1': 'kept'}
+    assert await storage.get_last_seen(1) == date(2026, 1, 1)
+    assert await storage.list_deliveries(since=0) == [(1.0, 2.0, '@chan', 'post_1', None)]
+    await storage.close()
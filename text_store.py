@@ -0,0 +1,54 @@
+import hashlib
+
+
+class TextStore:
+    """Content-addressed text storage: identical texts are stored once and reference counted."""
+
+    def __init__(self) -> None:
+        self._texts: dict[str, str] = {}
+        self._refs: dict[str, int] = {}
+
+    @staticmethod
+    def text_id(text: str) -> str:
+        """Content hash used as the id of a text."""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def add(self, text: str) -> str:
+        """Store a text (or add a reference to an identical one) and return its id."""
+        text_id = self.text_id(text)
+        if text_id in self._refs:
+            self._refs[text_id] += 1
+        else:
+            self._texts[text_id] = text
+            self._refs[text_id] = 1
+        return text_id
+
+    def get(self, text_id: str) -> str:
+        """Get a text by id. Raises KeyError if it is not stored."""
+        return self._texts[text_id]
+
+    def release(self, text_id: str) -> None:
+        """Drop one reference; the text is removed when nothing references it."""
+        refs = self._refs.get(text_id)
+        if refs is None:
+            return
+        if refs > 1:
+            self._refs[text_id] = refs - 1
+        else:
+            del self._refs[text_id]
+            del self._texts[text_id]
+
+    def replace(self, text_id: str, new_text: str) -> str:
+        """Copy-on-write edit: reference `new_text` instead of `text_id` and return the new id.
+
+        Other references to the old text are left untouched.
+        """
+        new_id = self.add(new_text)
+        self.release(text_id)
+        return new_id
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def __contains__(self, text_id: str) -> bool:
+        return text_id in self._texts
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_io_executor: ThreadPoolExecutor | None = None
+_lag_monitor: asyncio.Task | None = None
+
+
+def get_io_executor() -> ThreadPoolExecutor:
+    """Get the thread pool for blocking I/O, creating it on first use."""
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=settings.IO_WORKERS, thread_name_prefix='io')
+    return _io_executor
+
+
+async def run_io(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking function (disk, database) in the I/O thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown() -> None:
+    """Stop the loop lag monitor, wait for pending I/O and stop the thread pool."""
+    global _io_executor, _lag_monitor
+    if _lag_monitor is not None:
+        _lag_monitor.cancel()
+        _lag_monitor = None
+    if _io_executor is not None:
+        _io_executor.shutdown(wait=True)
+        _io_executor = None
+
+
+async def monitor_loop_lag(interval: float, threshold: float) -> None:
+    """Log a warning whenever the event loop wakes up later than `threshold` seconds.
+
+    A late wake-up means some callback held the loop, delaying every other update and job.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - start - interval
+        if lag > threshold:
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms (threshold {threshold * 1000:.0f} ms)")
+
+
+def start_loop_lag_monitor(interval: float, threshold: float) -> None:
+    """Start monitor_loop_lag in the background; stopped by shutdown()."""
+    global _lag_monitor
+    if _lag_monitor is None:
+        _lag_monitor = asyncio.get_running_loop().create_task(monitor_loop_lag(interval, threshold))
+
+
+def enable_slow_callback_logging(threshold: float) -> None:
+    """Use asyncio debug mode to log the callbacks that block the loop longer than `threshold`.
+
+    Debug mode adds overhead to every callback, so this is meant for troubleshooting only.
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_debug(True)
+    loop.slow_callback_duration = threshold
+    logging.getLogger('asyncio').setLevel(logging.WARNING)